@@ -5,21 +5,67 @@ FastAPI MCP Server with ChatGPT Apps Integration
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
-from pydantic import BaseModel
-import uvicorn
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, Dict, List, Optional
 import os
-import json
 import asyncio
+import logging
 from datetime import datetime
-import random
 import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from asgi_middleware import CompressionMiddleware, TimingTimeoutMiddleware, parse_route_timeouts
+import metrics
+import result_cache
+import serialization
+import structured_logging
+from serialization import FastJSONResponse
+from static_payloads import CachedPayload, FilePayload, dumps_compact
+import text_analyzer
+import weather_provider
+from tool_registry import progress_notifier, reporting_progress
+from tools import registry, text_result, WeatherInput, CalculatorInput, TextAnalysisInput, FileSearchInput
+
+# Queue-backed structured logging (see structured_logging.py)
+structured_logging.configure_logging()
+logger = logging.getLogger("mcp")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the event loop lag monitor; on shutdown stop it and release pooled connections
+    """
+    app.state.loop_lag_monitor = asyncio.create_task(metrics.monitor_loop_lag())
+    try:
+        yield
+    finally:
+        app.state.loop_lag_monitor.cancel()
+        metrics.mark_process_dead()
+        # Release the weather provider's pooled upstream connections
+        await weather_provider.default_provider().close()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="GPT Integration Tools",
     description="A comprehensive set of tools including weather, calculator, text analysis, and file search capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson-backed rendering when available (see serialization.py)
+    default_response_class=FastJSONResponse
+)
+
+# JSON-RPC batch limits: max entries per batch and how many run at once
+MCP_BATCH_MAX_SIZE = int(os.getenv("MCP_BATCH_MAX_SIZE", "100"))
+MCP_BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
+# Seconds between keep-alive comments on idle SSE streams
+MCP_SSE_PING_INTERVAL = float(os.getenv("MCP_SSE_PING_INTERVAL", "15"))
+# Seconds an SSE stream may stay open before outstanding requests are cancelled (0 disables),
+# and per-path overrides like MCP_ROUTE_TIMEOUTS (longest matching prefix wins)
+MCP_SSE_MAX_DURATION = float(os.getenv("MCP_SSE_MAX_DURATION", "300"))
+MCP_SSE_ROUTE_MAX_DURATIONS = sorted(
+    parse_route_timeouts(os.getenv("MCP_SSE_ROUTE_MAX_DURATIONS", ""), "MCP_SSE_ROUTE_MAX_DURATIONS").items(),
+    key=lambda item: len(item[0]), reverse=True
 )
 
 # Add CORS middleware
@@ -31,42 +77,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add timeout middleware with faster response
-@app.middleware("http")
-async def timeout_middleware(request: Request, call_next):
-    start_time = time.time()
-    try:
-        # Reduce timeout to 5 seconds for faster response
-        response = await asyncio.wait_for(call_next(request), timeout=5.0)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        # Add keep-alive headers
-        response.headers["Connection"] = "keep-alive"
-        response.headers["Keep-Alive"] = "timeout=5, max=1000"
-        
-        return response
-    except asyncio.TimeoutError:
-        return JSONResponse(
-            status_code=504,
-            content={"error": "Request timeout", "message": "The request took too long to process"}
-        )
-
-# Pydantic models for tool inputs
-class WeatherInput(BaseModel):
-    location: str
-    units: str = "celsius"
-
-class CalculatorInput(BaseModel):
-    expression: str
+# Negotiated gzip/br compression of larger responses (raw ASGI; see asgi_middleware.py)
+app.add_middleware(CompressionMiddleware)
 
-class TextAnalysisInput(BaseModel):
-    text: str
-    analysis_type: str = "sentiment"
-
-class FileSearchInput(BaseModel):
-    query: str
-    file_type: str = None
+# Timing, per-route timeout and keep-alive headers (raw ASGI; see asgi_middleware.py)
+app.add_middleware(TimingTimeoutMiddleware)
 
 # Health check endpoint
 @app.get("/health")
@@ -75,7 +90,7 @@ async def health_check():
     """
     Health check endpoint
     """
-    return JSONResponse(
+    return FastJSONResponse(
         content={
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
@@ -85,9 +100,7 @@ async def health_check():
         headers={
             "Cache-Control": "no-cache, no-store, must-revalidate",
             "Pragma": "no-cache",
-            "Expires": "0",
-            "Connection": "keep-alive",
-            "Keep-Alive": "timeout=5, max=1000"
+            "Expires": "0"
         }
     )
 
@@ -97,26 +110,38 @@ async def ping():
     """
     Ultra-fast ping endpoint for ChatGPT Apps validation
     """
-    return JSONResponse(
+    return FastJSONResponse(
         content={"pong": True},
         headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive"
+            "Cache-Control": "no-cache"
         }
     )
 
+# Prometheus metrics (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set)
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+# Static files, held in memory and revalidated by mtime (see static_payloads.FilePayload)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+web_interface = FilePayload(os.path.join(APP_DIR, "web_interface.html"), media_type="text/html")
+app_manifest = FilePayload(
+    os.path.join(APP_DIR, "app_manifest.json"), media_type="application/json",
+    transform=lambda raw: dumps_compact(serialization.loads(raw)),
+)
+
 # Serve web interface
 @app.get("/")
 @app.head("/")
-async def serve_web_interface():
+async def serve_web_interface(request: Request):
     """
     Serve the main web interface for testing tools
     """
-    interface_path = "web_interface.html"
-    if os.path.exists(interface_path):
-        return FileResponse(interface_path, media_type="text/html")
+    payload = web_interface.get()
+    if payload is not None:
+        return payload.response(request)
     else:
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": "GPT Integration Tools API",
                 "version": "1.0.0",
@@ -138,15 +163,13 @@ async def test_route():
 # App manifest endpoint
 @app.get("/manifest")
 @app.head("/manifest")
-async def get_app_manifest():
+async def get_app_manifest(request: Request):
     """
     Return the app manifest for ChatGPT Apps SDK
     """
-    manifest_path = "app_manifest.json"
-    if os.path.exists(manifest_path):
-        with open(manifest_path, 'r') as f:
-            manifest = json.load(f)
-        return manifest
+    payload = app_manifest.get()
+    if payload is not None:
+        return payload.response(request)
     else:
         raise HTTPException(status_code=404, detail="App manifest not found")
 
@@ -157,7 +180,7 @@ async def mcp_info():
     """
     MCP server information endpoint
     """
-    return JSONResponse(
+    return FastJSONResponse(
         content={
             "name": "GPT Integration Tools",
             "version": "1.0.0",
@@ -171,188 +194,354 @@ async def mcp_info():
             "Expires": "0",
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-            "Connection": "keep-alive",
-            "Keep-Alive": "timeout=5, max=1000"
+            "Access-Control-Allow-Headers": "*"
         }
     )
 
-@app.post("/mcp")
-async def mcp_endpoint(request: Request):
+def _jsonrpc_error(request_id, code: int, message: str) -> Dict[str, Any]:
+    """Build a JSON-RPC 2.0 error response"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+def observed(handler):
+    """
+    Wrap a JSON-RPC message handler so each call is timed and its errors counted
+    """
+    async def run(message: Dict[str, Any]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        try:
+            response = await handler(message)
+        except Exception:
+            metrics.observe_jsonrpc(message, None, time.perf_counter() - start_time, registry, failed=True)
+            raise
+        metrics.observe_jsonrpc(message, response, time.perf_counter() - start_time, registry)
+        return response
+    return run
+
+def batch_error(messages: List[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Error payload for a batch that cannot be executed at all (empty or too large)
+    """
+    if not messages:
+        metrics.count_error("other", -32600)
+        return _jsonrpc_error(None, -32600, "Invalid Request: empty batch")
+    if len(messages) > MCP_BATCH_MAX_SIZE:
+        metrics.count_error("other", -32600)
+        return _jsonrpc_error(None, -32600, f"Invalid Request: batch exceeds {MCP_BATCH_MAX_SIZE} entries")
+    return None
+
+async def run_jsonrpc_entry(message: Any, handler) -> Optional[Dict[str, Any]]:
     """
-    Main MCP endpoint for handling MCP protocol requests
+    Run one JSON-RPC message; None for notifications, which never get a response
     """
+    if not isinstance(message, dict):
+        metrics.count_error("other", -32600)
+        return _jsonrpc_error(None, -32600, "Invalid Request")
     try:
-        body = await request.json()
-        method = body.get("method")
-        params = body.get("params", {})
-        request_id = body.get("id")
-        
-        if method == "initialize":
-            return JSONResponse(
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {
-                            "tools": {
-                                "listChanged": False
-                            }
-                        },
-                        "serverInfo": {
-                            "name": "GPT Integration Tools",
-                            "version": "1.0.0"
-                        }
-                    }
-                }
-            )
-        elif method == "tools/list":
-            return JSONResponse(
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "tools": [
-                            {
-                                "name": "weather",
-                                "description": "Get current weather information for any location",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "location": {
-                                            "type": "string",
-                                            "description": "The city or location to get weather for"
-                                        },
-                                        "units": {
-                                            "type": "string",
-                                            "enum": ["celsius", "fahrenheit"],
-                                            "default": "celsius",
-                                            "description": "Temperature units"
-                                        }
-                                    },
-                                    "required": ["location"]
-                                }
-                            },
-                            {
-                                "name": "calculator",
-                                "description": "Perform mathematical calculations",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "expression": {
-                                            "type": "string",
-                                            "description": "Mathematical expression to evaluate"
-                                        }
-                                    },
-                                    "required": ["expression"]
-                                }
-                            },
-                            {
-                                "name": "text_analysis",
-                                "description": "Analyze text for sentiment, word count, or summary",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "text": {
-                                            "type": "string",
-                                            "description": "Text to analyze"
-                                        },
-                                        "analysis_type": {
-                                            "type": "string",
-                                            "enum": ["sentiment", "word_count", "summary"],
-                                            "default": "sentiment",
-                                            "description": "Type of analysis to perform"
-                                        }
-                                    },
-                                    "required": ["text"]
-                                }
-                            },
-                            {
-                                "name": "file_search",
-                                "description": "Search for files in the system",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "query": {
-                                            "type": "string",
-                                            "description": "Search query for files"
-                                        },
-                                        "file_type": {
-                                            "type": "string",
-                                            "description": "Optional file type filter"
-                                        }
-                                    },
-                                    "required": ["query"]
-                                }
-                            }
-                        ]
-                    }
-                }
-            )
-        elif method == "tools/call":
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            # Log tool call for debugging
-            print(f"🔧 MCP TOOL CALLED: {tool_name}")
-            print(f"   Arguments: {arguments}")
-            print(f"   Request ID: {request_id}")
-            print(f"   User-Agent: {request.headers.get('User-Agent', 'Unknown')}")
-            print(f"   Origin: {request.headers.get('Origin', 'Unknown')}")
-            
-            # Route to appropriate tool
-            if tool_name == "weather":
-                result = await weather_tool(WeatherInput(**arguments))
-            elif tool_name == "calculator":
-                result = await calculator_tool(CalculatorInput(**arguments))
-            elif tool_name == "text_analysis":
-                result = await text_analysis_tool(TextAnalysisInput(**arguments))
-            elif tool_name == "file_search":
-                result = await file_search_tool(FileSearchInput(**arguments))
+        response = await handler(message)
+    except Exception as e:
+        response = _jsonrpc_error(message.get("id"), -32603, f"Internal error: {str(e)}")
+    # Notifications (no "id" member) never get a response
+    return response if "id" in message else None
+
+async def execute_jsonrpc_batch(messages: List[Any], handler, on_response=None) -> List[Dict[str, Any]]:
+    """
+    Run batch entries in parallel (bounded by MCP_BATCH_CONCURRENCY) and return their responses.
+
+    `on_response` is called with each response as soon as its entry completes.
+    """
+    semaphore = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+
+    async def run_entry(message):
+        async with semaphore:
+            response = await run_jsonrpc_entry(message, handler)
+        if response is not None and on_response is not None:
+            on_response(response)
+        return response
+
+    responses = await asyncio.gather(*(run_entry(message) for message in messages))
+    return [response for response in responses if response is not None]
+
+async def run_jsonrpc_batch(messages: List[Any], handler) -> Response:
+    """
+    Execute a JSON-RPC 2.0 batch concurrently and return the responses in one array.
+
+    Notifications are executed but produce no entry in the response array, as the
+    spec requires.
+    """
+    error = batch_error(messages)
+    if error is not None:
+        return FastJSONResponse(content=error)
+    responses = await execute_jsonrpc_batch(messages, handler)
+    if not responses:
+        return Response(status_code=202)
+    return FastJSONResponse(content=responses)
+
+def with_cache_header(response: Response, cache_statuses: List[str]) -> Response:
+    """
+    Add X-Cache (HIT/MISS) when the request ran cacheable tools
+    """
+    value = result_cache.x_cache_header(cache_statuses)
+    if value is not None:
+        response.headers["X-Cache"] = value
+    return response
+
+def wants_event_stream(request: Request, body: Any) -> bool:
+    """
+    Answer with SSE when the client accepts it and at least one tools/call request
+    could stream progress; everything else stays a plain JSON response
+    """
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return False
+    messages = body if isinstance(body, list) else [body]
+    return any(isinstance(message, dict) and message.get("method") == "tools/call" and "id" in message
+               for message in messages)
+
+def _sse_event(message: Dict[str, Any]) -> bytes:
+    return b"event: message\ndata: " + serialization.dumps(message) + b"\n\n"
+
+def sse_max_duration(path: str) -> float:
+    """Maximum SSE stream duration for a path (MCP_SSE_ROUTE_MAX_DURATIONS, else MCP_SSE_MAX_DURATION)"""
+    for prefix, duration in MCP_SSE_ROUTE_MAX_DURATIONS:
+        if path.startswith(prefix):
+            return duration
+    return MCP_SSE_MAX_DURATION
+
+def stream_jsonrpc(body: Any, handler, max_duration: float = MCP_SSE_MAX_DURATION) -> StreamingResponse:
+    """
+    MCP streamable-HTTP response: progress notifications as tools report them,
+    then each JSON-RPC response as soon as it is ready, on one SSE stream.
+
+    Headers go out immediately, so slow tools are not cut off by the request
+    timeout, and a comment line every MCP_SSE_PING_INTERVAL seconds keeps idle
+    streams open through proxies. After `max_duration` seconds (0 disables) the
+    work still running is cancelled and each request that has not been answered
+    gets a JSON-RPC error event instead.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    # (id, method) of the requests still owed a response
+    messages = body if isinstance(body, list) else [body]
+    pending = [(message["id"], message.get("method")) for message in messages
+               if isinstance(message, dict) and "id" in message]
+
+    def emit(message: Optional[Dict[str, Any]]) -> None:
+        # Thread-safe: tools may report progress from worker threads
+        loop.call_soon_threadsafe(events.put_nowait, message)
+
+    async def run_with_progress(message: Dict[str, Any]) -> Dict[str, Any]:
+        with reporting_progress(progress_notifier(message, emit)):
+            return await handler(message)
+
+    async def run():
+        try:
+            if isinstance(body, list):
+                error = batch_error(body)
+                if error is not None:
+                    emit(error)
+                else:
+                    await execute_jsonrpc_batch(body, run_with_progress, on_response=emit)
             else:
-                print(f"❌ Unknown tool called: {tool_name}")
-                return JSONResponse(
-                    content={
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Unknown tool: {tool_name}"
-                        }
+                response = await run_jsonrpc_entry(body, run_with_progress)
+                if response is not None:
+                    emit(response)
+        finally:
+            emit(None)
+
+    def answered(message: Dict[str, Any]) -> None:
+        for index, (request_id, _) in enumerate(pending):
+            if "method" not in message and message.get("id") == request_id:
+                del pending[index]
+                return
+
+    async def event_source():
+        task = asyncio.ensure_future(run())
+        deadline = loop.time() + max_duration if max_duration > 0 else None
+        try:
+            while True:
+                wait = MCP_SSE_PING_INTERVAL
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        task.cancel()
+                        for request_id, method in pending:
+                            metrics.count_error(method if method in metrics.KNOWN_METHODS else "other", -32603)
+                            yield _sse_event(_jsonrpc_error(
+                                request_id, -32603, f"Request timeout: no response within {max_duration:g} seconds"
+                            ))
+                        break
+                    wait = min(wait, remaining)
+                try:
+                    message = await asyncio.wait_for(events.get(), wait)
+                except asyncio.TimeoutError:
+                    if wait == MCP_SSE_PING_INTERVAL:
+                        yield b": ping\n\n"
+                    continue
+                if message is None:
+                    break
+                answered(message)
+                yield _sse_event(message)
+        finally:
+            # Client disconnected: stop the work it was waiting for
+            task.cancel()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@lru_cache(maxsize=None)
+def _tools_catalog(include_title: bool, registry_version: int) -> CachedPayload:
+    return CachedPayload.from_json({"tools": registry.list_tools(include_title)})
+
+def tools_catalog(include_title: bool = False) -> CachedPayload:
+    """
+    The tool catalog serialized once per registry version
+    """
+    return _tools_catalog(include_title, registry.version)
+
+def jsonrpc_result_bytes(request_id, result_body: bytes) -> bytes:
+    """Wrap an already-serialized result in a JSON-RPC 2.0 response envelope"""
+    return b'{"jsonrpc":"2.0","id":' + dumps_compact(request_id) + b',"result":' + result_body + b'}'
+
+def tool_call_fields(tool_name, arguments, request_id, request: Request) -> Dict[str, Any]:
+    """Structured log fields for a tools/call (arguments truncated and redacted)"""
+    return {
+        "tool": tool_name,
+        "arguments": structured_logging.summarize(arguments),
+        "request_id": request_id,
+        "user_agent": request.headers.get("User-Agent", "Unknown"),
+        "origin": request.headers.get("Origin", "Unknown"),
+    }
+
+async def handle_mcp_message(message: Dict[str, Any], request: Request) -> Dict[str, Any]:
+    """
+    Handle a single MCP JSON-RPC message and return the response payload
+    """
+    method = message.get("method")
+    params = message.get("params", {})
+    request_id = message.get("id")
+    
+    if method == "initialize":
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {
+                    "tools": {
+                        "listChanged": False
                     }
-                )
-            
-            print(f"✅ Tool {tool_name} executed successfully")
-            
-            return JSONResponse(
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": result
-                }
-            )
-        elif method == "ping":
-            return JSONResponse(
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {}
+                },
+                "serverInfo": {
+                    "name": "GPT Integration Tools",
+                    "version": "1.0.0"
                 }
-            )
-        else:
-            return JSONResponse(
-                content={
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Method not found: {method}"
-                    }
+            }
+        }
+    elif method == "tools/list":
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "tools": registry.list_tools()
+            }
+        }
+    elif method == "tools/call":
+        tool_name = params.get("name")
+        arguments = params.get("arguments", {})
+        
+        # Route to the registered tool
+        if tool_name not in registry:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("unknown tool", extra={"fields": tool_call_fields(tool_name, arguments, request_id, request)})
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32601,
+                    "message": f"Unknown tool: {tool_name}"
                 }
+            }
+        start_time = time.perf_counter()
+        try:
+            result = await registry.call(tool_name, arguments)
+        except Exception as e:
+            if logger.isEnabledFor(logging.WARNING):
+                fields = tool_call_fields(tool_name, arguments, request_id, request)
+                fields.update(duration_ms=round((time.perf_counter() - start_time) * 1000, 3), error=str(e))
+                logger.warning("tool call failed", extra={"fields": fields})
+            raise
+
+        # Guarded so disabled or unsampled logging costs no argument summary or formatting
+        if logger.isEnabledFor(logging.INFO) and structured_logging.sampled():
+            fields = tool_call_fields(tool_name, arguments, request_id, request)
+            fields["duration_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+            logger.info("tool call", extra={"fields": fields})
+        
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": result
+        }
+    elif method == "ping":
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {}
+        }
+    else:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32601,
+                "message": f"Method not found: {method}"
+            }
+        }
+
+@app.post("/mcp")
+async def mcp_endpoint(request: Request):
+    """
+    Main MCP endpoint for handling MCP protocol requests (single or batch)
+    """
+    body = None
+    try:
+        body = serialization.loads(await request.body())
+        handler = observed(lambda message: handle_mcp_message(message, request))
+        if wants_event_stream(request, body):
+            return stream_jsonrpc(body, handler, sse_max_duration(request.url.path))
+        if isinstance(body, list):
+            with result_cache.tracking() as cache_statuses:
+                return with_cache_header(await run_jsonrpc_batch(body, handler), cache_statuses)
+        if isinstance(body, dict) and body.get("method") == "tools/list" and "id" in body:
+            # Hot metadata path: splice the pre-serialized catalog into the envelope
+            start_time = time.perf_counter()
+            catalog = tools_catalog()
+            metrics.observe_jsonrpc(body, None, time.perf_counter() - start_time, registry)
+            return Response(
+                content=jsonrpc_result_bytes(body.get("id"), catalog.body),
+                media_type="application/json",
+                headers={"ETag": catalog.etag}
             )
+        with result_cache.tracking() as cache_statuses:
+            response = await run_jsonrpc_entry(body, handler)
+        if response is None:
+            # A notification: accepted, with no response body (as for a notification-only batch)
+            return Response(status_code=202)
+        return with_cache_header(FastJSONResponse(content=response), cache_statuses)
     except Exception as e:
-        return JSONResponse(
+        if not isinstance(body, dict):
+            # Failures inside the handler were already counted by observed()
+            metrics.count_error("other", -32603)
+        return FastJSONResponse(
             content={
                 "jsonrpc": "2.0",
                 "id": None,
@@ -365,271 +554,135 @@ async def mcp_endpoint(request: Request):
 
 # MCP tools manifest endpoint
 @app.get("/mcp/tools")
-async def get_tools_manifest():
+async def get_tools_manifest(request: Request):
     """
-    Return the tools manifest for MCP
+    Return the tools manifest for MCP (ETag-validated, optionally gzip)
     """
-    return JSONResponse(
-        content={
-            "tools": [
-                {
-                    "name": "weather",
-                    "title": "Weather Information",
-                    "description": "Get current weather information for any location",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The city or location to get weather for"
-                            },
-                            "units": {
-                                "type": "string",
-                                "enum": ["celsius", "fahrenheit"],
-                                "default": "celsius",
-                                "description": "Temperature units"
-                            }
-                        },
-                        "required": ["location"]
-                    }
-                },
-                {
-                    "name": "calculator",
-                    "title": "Calculator",
-                    "description": "Perform mathematical calculations",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "expression": {
-                                "type": "string",
-                                "description": "Mathematical expression to evaluate"
-                            }
-                        },
-                        "required": ["expression"]
-                    }
-                },
-                {
-                    "name": "text_analysis",
-                    "title": "Text Analysis",
-                    "description": "Analyze text for sentiment, word count, or summary",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "text": {
-                                "type": "string",
-                                "description": "Text to analyze"
-                            },
-                            "analysis_type": {
-                                "type": "string",
-                                "enum": ["sentiment", "word_count", "summary"],
-                                "default": "sentiment",
-                                "description": "Type of analysis to perform"
-                            }
-                        },
-                        "required": ["text"]
-                    }
-                },
-                {
-                    "name": "file_search",
-                    "title": "File Search",
-                    "description": "Search for files in the system",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query for files"
-                            },
-                            "file_type": {
-                                "type": "string",
-                                "description": "Optional file type filter"
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                }
-            ]
-        },
-        headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        }
-    )
+    return tools_catalog(include_title=True).response(request)
 
 # Tool execution endpoints
-@app.post("/tools/weather")
-async def weather_tool(input_data: WeatherInput):
+async def run_tool_endpoint(tool_name: str, input_data, error_prefix: str):
     """
-    Weather tool implementation
+    Run a registered tool for its direct REST endpoint
     """
     try:
-        # Simulate weather data (in a real implementation, you'd call a weather API)
-        weather_data = {
-            "location": input_data.location,
-            "temperature": random.randint(15, 30),
-            "units": input_data.units,
-            "condition": random.choice(["Sunny", "Cloudy", "Rainy", "Partly Cloudy"]),
-            "humidity": random.randint(40, 80),
-            "wind_speed": random.randint(5, 20),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        temp_symbol = "°C" if input_data.units == "celsius" else "°F"
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": f"Weather in {input_data.location}: {weather_data['temperature']}{temp_symbol}, {weather_data['condition']}. Humidity: {weather_data['humidity']}%, Wind: {weather_data['wind_speed']} km/h"
-            }],
-            "isError": False
-        }
+        with result_cache.tracking() as cache_statuses:
+            result = await registry.run(registry.get(tool_name), input_data)
+        return with_cache_header(FastJSONResponse(content=result), cache_statuses)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Weather tool error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"{error_prefix}: {str(e)}")
+
+@app.post("/tools/weather")
+async def weather_tool(input_data: WeatherInput):
+    """
+    Weather tool endpoint
+    """
+    return await run_tool_endpoint("weather", input_data, "Weather tool error")
 
 @app.post("/tools/calculator")
 async def calculator_tool(input_data: CalculatorInput):
     """
-    Calculator tool implementation
+    Calculator tool endpoint
     """
-    try:
-        # Simple calculator (in a real implementation, you'd use a proper math parser)
-        result = eval(input_data.expression)
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": f"{input_data.expression} = {result}"
-            }],
-            "isError": False
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Calculator tool error: {str(e)}")
+    return await run_tool_endpoint("calculator", input_data, "Calculator tool error")
 
 @app.post("/tools/text_analysis")
 async def text_analysis_tool(input_data: TextAnalysisInput):
     """
-    Text analysis tool implementation
+    Text analysis tool endpoint
+    """
+    return await run_tool_endpoint("text_analysis", input_data, "Text analysis tool error")
+
+@app.post("/tools/text_analysis/stream")
+async def text_analysis_stream_tool(request: Request, analysis_type: str = "sentiment"):
+    """
+    Streaming text analysis for large documents
+
+    Accepts either a raw text body (sent chunked or not) or a multipart upload
+    with a `file` field; the text is analyzed chunk by chunk with bounded memory.
     """
     try:
-        text = input_data.text
-        analysis_type = input_data.analysis_type
-        
-        if analysis_type == "sentiment":
-            # Simple sentiment analysis (in a real implementation, you'd use NLP libraries)
-            positive_words = ["good", "great", "excellent", "amazing", "wonderful", "love", "like", "happy"]
-            negative_words = ["bad", "terrible", "awful", "hate", "dislike", "sad", "angry", "frustrated"]
-            
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            
-            if positive_count > negative_count:
-                sentiment = "Positive"
-            elif negative_count > positive_count:
-                sentiment = "Negative"
-            else:
-                sentiment = "Neutral"
-            
-            result = f"Sentiment: {sentiment}"
-            
-        elif analysis_type == "word_count":
-            word_count = len(text.split())
-            result = f"Word count: {word_count}"
-            
-        elif analysis_type == "summary":
-            # Simple summary (in a real implementation, you'd use summarization models)
-            words = text.split()
-            if len(words) > 10:
-                summary = " ".join(words[:10]) + "..."
-            else:
-                summary = text
-            result = f"Summary: {summary}"
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": result
-            }],
-            "isError": False
-        }
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise ValueError("Multipart upload needs a 'file' field")
+            analysis_type = form.get("analysis_type", analysis_type)
+
+            async def chunks():
+                while True:
+                    chunk = await upload.read(text_analyzer.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+            result = await text_analyzer.analyze_stream(chunks(), analysis_type)
+        else:
+            result = await text_analyzer.analyze_stream(request.stream(), analysis_type)
+
+        return text_result(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text analysis tool error: {str(e)}")
 
 @app.post("/tools/file_search")
 async def file_search_tool(input_data: FileSearchInput):
     """
-    File search tool implementation
+    File search tool endpoint
     """
-    try:
-        # Simulate file search (in a real implementation, you'd search actual files)
-        mock_files = [
-            f"document_{input_data.query}_1.txt",
-            f"report_{input_data.query}_2024.pdf",
-            f"data_{input_data.query}.csv",
-            f"notes_{input_data.query}.md"
-        ]
-        
-        if input_data.file_type:
-            mock_files = [f for f in mock_files if f.endswith(f".{input_data.file_type}")]
+    return await run_tool_endpoint("file_search", input_data, "File search tool error")
+
+async def handle_mcp_call_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Handle a single tool call message in MCP-compatible format
+    """
+    method = message.get("method")
+    params = message.get("params", {})
+    
+    if method == "tools/call":
+        tool_name = params.get("name")
+        arguments = params.get("arguments", {})
         
-        result = f"Found {len(mock_files)} files matching '{input_data.query}'"
-        if input_data.file_type:
-            result += f" with type '{input_data.file_type}'"
+        # Route to the registered tool (raises UnknownToolError for unknown names)
+        result = await registry.call(tool_name, arguments)
         
         return {
-            "content": [{
-                "type": "text",
-                "text": result + f"\nFiles: {', '.join(mock_files)}"
-            }],
-            "isError": False
+            "jsonrpc": "2.0",
+            "id": message.get("id"),
+            "result": result
+        }
+    else:
+        return {
+            "jsonrpc": "2.0",
+            "id": message.get("id"),
+            "error": {
+                "code": -32601,
+                "message": f"Method not found: {method}"
+            }
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"File search tool error: {str(e)}")
+
+observed_call_message = observed(handle_mcp_call_message)
 
 # Simple MCP-compatible endpoint for tool calls
 @app.post("/mcp/call")
 async def mcp_tool_call(request: Request):
     """
-    Handle tool calls in MCP-compatible format
+    Handle tool calls in MCP-compatible format (single or batch)
     """
+    body = None
     try:
-        body = await request.json()
-        method = body.get("method")
-        params = body.get("params", {})
-        
-        if method == "tools/call":
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            # Route to appropriate tool
-            if tool_name == "weather":
-                result = await weather_tool(WeatherInput(**arguments))
-            elif tool_name == "calculator":
-                result = await calculator_tool(CalculatorInput(**arguments))
-            elif tool_name == "text_analysis":
-                result = await text_analysis_tool(TextAnalysisInput(**arguments))
-            elif tool_name == "file_search":
-                result = await file_search_tool(FileSearchInput(**arguments))
+        body = serialization.loads(await request.body())
+        with result_cache.tracking() as cache_statuses:
+            if isinstance(body, list):
+                response = await run_jsonrpc_batch(body, observed_call_message)
             else:
-                raise ValueError(f"Unknown tool: {tool_name}")
-            
-            return JSONResponse(content={
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "result": result
-            })
-        else:
-            return JSONResponse(content={
-                "jsonrpc": "2.0",
-                "id": body.get("id"),
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {method}"
-                }
-            })
+                response = FastJSONResponse(content=await observed_call_message(body))
+        return with_cache_header(response, cache_statuses)
     except Exception as e:
-        return JSONResponse(
+        if not isinstance(body, dict):
+            # Failures inside the handler were already counted by observed()
+            metrics.count_error("other", -32603)
+        return FastJSONResponse(
             status_code=500,
             content={
                 "jsonrpc": "2.0",
@@ -649,7 +702,7 @@ async def validate_connector():
     """
     Endpoint for ChatGPT Apps to validate the connector
     """
-    return JSONResponse(
+    return FastJSONResponse(
         content={
             "valid": True,
             "status": "ready",
@@ -681,7 +734,7 @@ async def options_handler():
     """
     Handle CORS preflight requests
     """
-    return JSONResponse(
+    return FastJSONResponse(
         content={},
         headers={
             "Access-Control-Allow-Origin": "*",
@@ -694,4 +747,6 @@ async def options_handler():
 # Widget endpoints removed - components directory cleaned up
 
 if __name__ == "__main__":
+    # Imported here so that building the ASGI app (Vercel, tests) does not load the server
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Raw ASGI middleware for the HTTP server
+
+Written against the ASGI interface directly instead of @app.middleware("http")
+(BaseHTTPMiddleware), which runs every request in an extra task and copies
+every response body through a memory stream.
+
+Configuration:
+    MCP_REQUEST_TIMEOUT       seconds until a response must have started (default 5.0, 0 disables)
+    MCP_ROUTE_TIMEOUTS        per-path overrides, e.g. "/tools/text_analysis/stream=300,/mcp=10";
+                              the longest matching path prefix wins
+    KEEP_ALIVE                idle keep-alive seconds advertised in the Keep-Alive header
+    MCP_COMPRESSION           compress responses for clients that accept it (true/false)
+    MCP_COMPRESSION_MIN_SIZE  smaller bodies are sent as they are (bytes, default 1024)
+    MCP_COMPRESSION_ROUTES    per-path encodings, e.g. "/metrics=gzip,/tools=off" ("br|gzip"
+                              lists them in order of preference); longest prefix wins
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import compression
+import metrics
+import serialization
+
+MCP_REQUEST_TIMEOUT = float(os.getenv("MCP_REQUEST_TIMEOUT", "5.0"))
+MCP_ROUTE_TIMEOUTS = os.getenv("MCP_ROUTE_TIMEOUTS", "/tools/text_analysis/stream=300")
+# Advertised in the Keep-Alive header; the same setting run.py gives uvicorn
+KEEP_ALIVE = int(os.getenv("KEEP_ALIVE", "5"))
+MCP_COMPRESSION = os.getenv("MCP_COMPRESSION", "true").lower() == "true"
+MCP_COMPRESSION_MIN_SIZE = int(os.getenv("MCP_COMPRESSION_MIN_SIZE", "1024"))
+MCP_COMPRESSION_ROUTES = os.getenv("MCP_COMPRESSION_ROUTES", "")
+
+# Content types worth compressing; event streams are not (every event must go out as sent)
+COMPRESSIBLE_TYPES = (b"application/json", b"text/html", b"text/plain", b"text/css", b"text/csv",
+                      b"application/javascript", b"application/xml", b"image/svg+xml")
+
+
+def parse_route_timeouts(spec: str, setting: str = "MCP_ROUTE_TIMEOUTS") -> Dict[str, float]:
+    """Parse "path=seconds,path=seconds" into a dict (`setting` names the variable in errors)"""
+    timeouts = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        path, separator, seconds = entry.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid {setting} entry: {entry!r}")
+        timeouts[path.strip()] = float(seconds)
+    return timeouts
+
+
+class TimingTimeoutMiddleware:
+    """
+    Adds X-Process-Time and keep-alive headers, and answers 504 when a request
+    has not started its response within the timeout for its path
+
+    The timeout covers the time until the response starts, so streamed bodies are
+    not cut off once they are under way. It is enforced with a single timer
+    that cancels the request task; no extra task is created per request.
+    """
+
+    def __init__(self, app, timeout: float = MCP_REQUEST_TIMEOUT, route_timeouts: str = MCP_ROUTE_TIMEOUTS):
+        self.app = app
+        self.timeout = timeout
+        # Longest prefix first, so the most specific override wins
+        self.route_timeouts: List[Tuple[str, float]] = sorted(
+            parse_route_timeouts(route_timeouts).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.extra_headers = [
+            (b"connection", b"keep-alive"),
+            (b"keep-alive", f"timeout={KEEP_ALIVE}, max=1000".encode("latin-1")),
+        ]
+        self.timeout_body = serialization.dumps(
+            {"error": "Request timeout", "message": "The request took too long to process"}
+        )
+
+    def timeout_for(self, path: str) -> float:
+        for prefix, timeout in self.route_timeouts:
+            if path.startswith(prefix):
+                return timeout
+        return self.timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        task = asyncio.current_task()
+        started = False
+        expired = False
+
+        def expire():
+            nonlocal expired
+            expired = True
+            task.cancel()
+
+        timeout = self.timeout_for(scope["path"])
+        deadline = asyncio.get_running_loop().call_later(timeout, expire) if timeout > 0 else None
+
+        async def send_with_headers(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                # The response is under way: the timeout no longer applies
+                started = True
+                if deadline is not None:
+                    deadline.cancel()
+                process_time = str(time.perf_counter() - start_time).encode("latin-1")
+                # Replace, not add to, any connection headers the route set itself
+                headers = [(key, value) for key, value in message.get("headers", ())
+                           if key.lower() not in (b"connection", b"keep-alive")]
+                message = {
+                    **message,
+                    "headers": [*headers, (b"x-process-time", process_time), *self.extra_headers],
+                }
+            await send(message)
+
+        metrics.IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except asyncio.CancelledError:
+            if not expired or started:
+                raise
+            # Our own cancellation: clear it so the 504 can still be sent
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            metrics.TIMEOUTS.labels(getattr(scope.get("route"), "path", "unmatched")).inc()
+            await send_with_headers({
+                "type": "http.response.start",
+                "status": 504,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self.timeout_body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self.timeout_body})
+        finally:
+            if deadline is not None:
+                deadline.cancel()
+            metrics.IN_FLIGHT.dec()
+
+
+def parse_route_encodings(spec: str) -> Dict[str, Tuple[str, ...]]:
+    """Parse "path=br|gzip,path=off" into a dict of path -> supported encodings in preference order"""
+    routes = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        path, separator, encodings = entry.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid MCP_COMPRESSION_ROUTES entry: {entry!r}")
+        names = [name.strip().lower() for name in encodings.split("|")]
+        unknown = [name for name in names if name not in ("br", "gzip", "off")]
+        if unknown:
+            raise ValueError(f"Invalid MCP_COMPRESSION_ROUTES encoding: {unknown[0]!r}")
+        routes[path.strip()] = tuple(name for name in names if name in compression.AVAILABLE)
+    return routes
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts (br, gzip)
+
+    Whole bodies smaller than the minimum size, event streams, bodies that are
+    already encoded (precompressed static payloads) and content types that do
+    not compress are sent untouched. Streamed bodies are compressed chunk by
+    chunk, each chunk flushed so nothing is held back.
+
+    A strong ETag on a response compressed here is weakened: the coded body is
+    not byte-identical to the one the route tagged, but is semantically the same,
+    so the weak comparison of If-None-Match still revalidates it.
+    """
+
+    def __init__(self, app, minimum_size: int = MCP_COMPRESSION_MIN_SIZE,
+                 routes: str = MCP_COMPRESSION_ROUTES, enabled: bool = MCP_COMPRESSION):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+        # Longest prefix first, so the most specific override wins
+        self.routes: List[Tuple[str, Tuple[str, ...]]] = sorted(
+            parse_route_encodings(routes).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def encodings_for(self, path: str) -> Tuple[str, ...]:
+        for prefix, encodings in self.routes:
+            if path.startswith(prefix):
+                return encodings
+        return compression.AVAILABLE
+
+    @staticmethod
+    def compressible(headers) -> bool:
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = (_header(headers, b"content-type") or b"").split(b";")[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = _header(scope["headers"], b"accept-encoding")
+        offered = self.encodings_for(scope["path"])
+        encoding = compression.negotiate(accept_encoding.decode("latin-1"), offered) \
+            if accept_encoding and offered else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[compression.StreamCompressor] = None
+        passthrough = False
+
+        def weakened_etag(headers):
+            return [(key, b"W/" + value if key.lower() == b"etag" and not value.startswith(b"W/") else value)
+                    for key, value in headers]
+
+        def encoded_start(length: Optional[int]):
+            headers = weakened_etag(start_message.get("headers", ()))
+            headers = [(key, value) for key, value in headers if key.lower() not in (b"content-length", b"vary")]
+            vary = _header(start_message.get("headers", ()), b"vary")
+            headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            if length is not None:
+                headers.append((b"content-length", str(length).encode("latin-1")))
+            return {**start_message, "headers": headers}
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 304 and _header(message.get("headers", ()), b"content-encoding") is None:
+                    # Same validator the 200 compressed here would have carried
+                    passthrough = True
+                    await send({**message, "headers": weakened_etag(message.get("headers", ()))})
+                elif message["status"] in (204, 304) or not self.compressible(message.get("headers", ())):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether compression pays off
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                if not more_body:
+                    # The whole body at once: the common case
+                    if len(body) < self.minimum_size:
+                        await send(start_message)
+                        await send(message)
+                    else:
+                        body = compression.compress(body, encoding)
+                        await send(encoded_start(len(body)))
+                        await send({"type": "http.response.body", "body": body})
+                    start_message = None
+                    return
+                compressor = compression.StreamCompressor(encoding)
+                await send(encoded_start(None))
+                start_message = None
+
+            if compressor is None:
+                await send(message)
+                return
+            chunk = compressor.compress(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
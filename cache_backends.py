@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Pluggable key/value backends for the result and weather caches
+
+Every backend stores opaque bytes under a string key with a TTL and never
+holds more than its byte budget: the memory and sqlite backends evict on the
+write that would exceed it, the shared one is a file of that size. Which one is used is set by CACHE_BACKEND:
+
+    memory  in-process LRU (default); each worker has its own cache
+    shared  memory-mapped file shared by all workers on the host; set-associative
+            slots guarded by fcntl record locks, so a result computed by one
+            worker is a hit in every other worker
+    sqlite  SQLite database in WAL mode: shared by workers and kept across restarts
+
+None of them needs an external service. The shared and sqlite backends keep
+one file per cache under CACHE_DIR (/dev/shm for `shared` when available, so
+the mapping is plain shared memory).
+
+Caching is best-effort: callers use try_get()/try_set(), which log and count a
+backend failure (a locked database, a full disk) as a miss or a skipped write
+instead of failing the request whose result was already computed. SQLite waits
+at most SQLITE_CACHE_BUSY_TIMEOUT for another worker's write lock, since it
+runs on the event loop.
+
+Configuration:
+    CACHE_BACKEND            memory, shared or sqlite
+    CACHE_DIR                directory of the shared/sqlite cache files
+    SHARED_CACHE_SLOT_BYTES  largest value the shared backend can hold; each entry takes a
+                             whole slot, so it sets the number of entries (budget / slot)
+    SQLITE_CACHE_BUSY_TIMEOUT seconds a sqlite read or write waits for a lock before giving up
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_DIR = os.getenv("CACHE_DIR")
+# Most tool results are well under 1 KiB; larger values bypass the shared cache
+SHARED_CACHE_SLOT_BYTES = int(os.getenv("SHARED_CACHE_SLOT_BYTES", str(4 * 1024)))
+# Short: a cache write that has to wait is skipped rather than stalling the event loop
+SQLITE_CACHE_BUSY_TIMEOUT = float(os.getenv("SQLITE_CACHE_BUSY_TIMEOUT", "0.02"))
+
+
+class CacheBackend(ABC):
+    """Byte-budgeted key/value store with per-entry TTL"""
+
+    name = "cache"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Value stored under `key`, or None if missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store `value` for `ttl` seconds (values that can never fit are ignored)"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        metrics.CACHE_ERRORS.labels(self.name).inc()
+        logger.warning(f"{self.name} cache {operation} failed: {error}")
+
+    def try_get(self, key: str) -> Optional[bytes]:
+        """get(), with a backend failure counted as a miss"""
+        try:
+            return self.get(key)
+        except Exception as e:
+            self._failed("read", e)
+            return None
+
+    def try_set(self, key: str, value: bytes, ttl: float) -> None:
+        """set(), with a backend failure skipping the write"""
+        try:
+            self.set(key, value, ttl)
+        except Exception as e:
+            self._failed("write", e)
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU capped at max_bytes of values"""
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self.delete(oldest)
+            metrics.CACHE_EVICTIONS.labels(self.name).inc()
+        metrics.CACHE_BYTES.labels(self.name).set(self.size)
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+        metrics.CACHE_BYTES.labels(self.name).set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Slot header: key digest, expiry and write time (wall clock, shared by processes), value length
+_SLOT_HEADER = struct.Struct("<16sddI4x")
+_EMPTY_DIGEST = bytes(16)
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    Fixed-size, memory-mapped cache file shared by every process that opens it
+
+    The file is divided into buckets of `ways` slots. A key hashes to one bucket;
+    a write reuses the key's slot, else an empty or expired one, else the slot
+    written longest ago. Each bucket is locked with an fcntl record lock (shared
+    for reads, exclusive for writes), so processes never see torn entries.
+    """
+
+    def __init__(self, name: str, path: str, max_bytes: int,
+                 slot_bytes: int = SHARED_CACHE_SLOT_BYTES, ways: int = 4):
+        import fcntl  # POSIX only
+        self._fcntl = fcntl
+        self.name = name
+        self.path = path
+        self.slot_size = _SLOT_HEADER.size + slot_bytes
+        self.ways = ways
+        self.buckets = max(1, max_bytes // (self.slot_size * ways))
+        self.bucket_size = self.slot_size * ways
+        size = self.buckets * self.bucket_size
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # Every process sizes the file the same way; growing a sparse file is idempotent
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def _bucket(self, digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") % self.buckets * self.bucket_size
+
+    def _lock(self, offset: int, mode: int) -> None:
+        self._fcntl.lockf(self._fd, mode, self.bucket_size, offset)
+
+    def get(self, key: str) -> Optional[bytes]:
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        self._lock(bucket, self._fcntl.LOCK_SH)
+        try:
+            for slot in range(bucket, bucket + self.bucket_size, self.slot_size):
+                slot_digest, expires, _, length = _SLOT_HEADER.unpack_from(self._map, slot)
+                if slot_digest == digest:
+                    if expires <= time.time():
+                        return None
+                    start = slot + _SLOT_HEADER.size
+                    return self._map[start:start + length]
+            return None
+        finally:
+            self._lock(bucket, self._fcntl.LOCK_UN)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.slot_size - _SLOT_HEADER.size:
+            return
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        now = time.time()
+        self._lock(bucket, self._fcntl.LOCK_EX)
+        try:
+            target = None
+            oldest = None
+            for slot in range(bucket, bucket + self.bucket_size, self.slot_size):
+                slot_digest, expires, stored, _ = _SLOT_HEADER.unpack_from(self._map, slot)
+                if slot_digest == digest or slot_digest == _EMPTY_DIGEST or expires <= now:
+                    target = slot
+                    if slot_digest == digest:
+                        break
+                elif oldest is None or stored < oldest[1]:
+                    oldest = (slot, stored)
+            if target is None:
+                target = oldest[0]
+                metrics.CACHE_EVICTIONS.labels(self.name).inc()
+            start = target + _SLOT_HEADER.size
+            self._map[start:start + len(value)] = value
+            _SLOT_HEADER.pack_into(self._map, target, digest, now + ttl, now, len(value))
+        finally:
+            self._lock(bucket, self._fcntl.LOCK_UN)
+
+    def delete(self, key: str) -> None:
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        self._lock(bucket, self._fcntl.LOCK_EX)
+        try:
+            for slot in range(bucket, bucket + self.bucket_size, self.slot_size):
+                if _SLOT_HEADER.unpack_from(self._map, slot)[0] == digest:
+                    _SLOT_HEADER.pack_into(self._map, slot, _EMPTY_DIGEST, 0.0, 0.0, 0)
+        finally:
+            self._lock(bucket, self._fcntl.LOCK_UN)
+
+    def clear(self) -> None:
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_EX)
+        try:
+            for slot in range(0, len(self._map), self.slot_size):
+                _SLOT_HEADER.pack_into(self._map, slot, _EMPTY_DIGEST, 0.0, 0.0, 0)
+        finally:
+            self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite (WAL mode) cache: shared by workers, persistent across restarts
+
+    Reads never block writers in WAL mode. Triggers keep the total size of the
+    values in cache_size, so each write can drop the oldest rows as soon as the
+    total exceeds max_bytes; expired rows are purged every `prune_every` writes.
+    """
+
+    def __init__(self, name: str, path: str, max_bytes: int, prune_every: int = 256,
+                 busy_timeout: float = SQLITE_CACHE_BUSY_TIMEOUT):
+        self.name = name
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._writes = 0
+        import sqlite3
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, stored REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)"
+            )
+            # Counted once, from whatever rows a file written before the triggers holds
+            self._db.execute(
+                "INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache))"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN "
+                "UPDATE cache_size SET bytes = bytes + LENGTH(NEW.value); END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF value ON cache BEGIN "
+                "UPDATE cache_size SET bytes = bytes + LENGTH(NEW.value) - LENGTH(OLD.value); END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN "
+                "UPDATE cache_size SET bytes = bytes - LENGTH(OLD.value); END"
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            raise
+        # Setting up may wait for other workers doing the same; cache traffic may not
+        self._db.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._db.execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        self._writes += 1
+        # One transaction, so concurrent writers see each other's totals
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # An upsert, not INSERT OR REPLACE: its implicit delete would not fire the trigger
+            self._db.execute(
+                "INSERT INTO cache (key, value, expires, stored) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+                "expires = excluded.expires, stored = excluded.stored",
+                (key, value, now + ttl, now)
+            )
+            if self._writes % self.prune_every == 0:
+                self._db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+            self._evict()
+            self._db.execute("COMMIT")
+        except BaseException:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            raise
+
+    def _size(self) -> int:
+        return self._db.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop the oldest rows until the total fits max_bytes"""
+        size = self._size()
+        evicted = 0
+        while size > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, LENGTH(value) FROM cache ORDER BY stored LIMIT 16"
+            ).fetchall()
+            if not rows:
+                break
+            for key, length in rows:
+                if size <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                size -= length
+                evicted += 1
+        if evicted:
+            metrics.CACHE_EVICTIONS.labels(self.name).inc(evicted)
+        metrics.CACHE_BYTES.labels(self.name).set(size)
+
+    def delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM cache")
+        metrics.CACHE_BYTES.labels(self.name).set(0)
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _cache_dir(backend: str) -> str:
+    if CACHE_DIR:
+        return CACHE_DIR
+    if backend == "shared" and os.path.isdir("/dev/shm"):
+        return "/dev/shm/gpt-tools-cache"
+    return os.path.join(tempfile.gettempdir(), "gpt-tools-cache")
+
+
+def create_backend(name: str, max_bytes: int, backend: str = CACHE_BACKEND) -> CacheBackend:
+    """The configured backend for the cache called `name` (one file per cache when on disk)"""
+    if backend == "memory":
+        return MemoryBackend(name, max_bytes)
+    if backend == "shared":
+        return SharedMemoryBackend(name, os.path.join(_cache_dir(backend), f"{name}.cache"), max_bytes)
+    if backend == "sqlite":
+        return SQLiteBackend(name, os.path.join(_cache_dir(backend), f"{name}.sqlite3"), max_bytes)
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend} (expected memory, shared or sqlite)")
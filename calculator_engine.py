@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Safe expression engine for the calculator tool
+
+Expressions are parsed once into a whitelisted AST, constant-folded and compiled
+to a code object that runs without builtins. Compiled forms are kept in a bounded
+LRU cache keyed on the normalized expression, so repeated expressions skip
+parsing and compilation entirely.
+
+Before anything is computed, a static cost estimate bounds the size of every
+integer the expression can produce (exponentiation towers, factorials, long
+products). Expressions over the limit are rejected outright; expensive but
+allowed ones run in an isolated worker process with a hard CPU/time budget, so
+the event loop never stalls on a single calculation.
+"""
+
+import ast
+import asyncio
+import io
+import logging
+import math
+import operator
+import os
+import tokenize
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+# Maximum number of compiled expressions kept in the LRU cache
+CALCULATOR_CACHE_SIZE = int(os.getenv("CALCULATOR_CACHE_SIZE", "1024"))
+# Longest expression accepted, in characters
+CALCULATOR_MAX_LENGTH = int(os.getenv("CALCULATOR_MAX_LENGTH", "1000"))
+# Largest integer (in decimal digits) any step of an expression may produce
+CALCULATOR_MAX_DIGITS = int(os.getenv("CALCULATOR_MAX_DIGITS", "4000"))
+# Expressions whose integers stay below this many bits are evaluated inline
+CALCULATOR_INLINE_BITS = int(os.getenv("CALCULATOR_INLINE_BITS", "4096"))
+# "process" runs expensive expressions in a killable worker, "inline" does not
+CALCULATOR_ISOLATION = os.getenv("CALCULATOR_ISOLATION", "process").lower()
+CALCULATOR_WORKERS = int(os.getenv("CALCULATOR_WORKERS", "1"))
+# Wall-clock budget (seconds) for an isolated evaluation, and the worker CPU budget
+CALCULATOR_TIMEOUT = float(os.getenv("CALCULATOR_TIMEOUT", "1.0"))
+CALCULATOR_CPU_SECONDS = int(os.getenv("CALCULATOR_CPU_SECONDS", "2"))
+
+MAX_RESULT_BITS = CALCULATOR_MAX_DIGITS * math.log2(10)
+# Magnitude bound used for floats: anything larger overflows immediately
+FLOAT_BITS = 1024
+# Deepest expression tree accepted (each level costs a few Python stack frames)
+MAX_DEPTH = 200
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid, unsafe or fail to evaluate"""
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "log2": math.log2,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "factorial": math.factorial,
+}
+
+# Functions that return integers when given integers (the rest return floats)
+INTEGER_FUNCTIONS = {"abs", "round", "min", "max", "floor", "ceil", "factorial"}
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+# Globals for compiled expressions: no builtins, only whitelisted names
+_EVAL_GLOBALS: Dict[str, Any] = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+
+# Tokens that carry no meaning in a single expression
+_IGNORED_TOKENS = {tokenize.COMMENT, tokenize.ENDMARKER, tokenize.DEDENT}
+
+
+def normalize_expression(expression: str) -> str:
+    """Canonical cache key: the expression's tokens separated by single spaces"""
+    # Checked before normalizing, which can make an expression longer
+    if len(expression) > CALCULATOR_MAX_LENGTH:
+        raise CalculatorError(f"Expression longer than {CALCULATOR_MAX_LENGTH} characters")
+    expression = expression.strip()
+    try:
+        tokens = [
+            token.string for token in tokenize.generate_tokens(io.StringIO(expression).readline)
+            if token.type not in _IGNORED_TOKENS and token.string
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        # Left as it is for the parser to report
+        return expression
+    # Tokens are never merged, so "2 * * 3" stays distinct from "2 ** 3"
+    return " ".join(tokens)
+
+
+class _Validator(ast.NodeVisitor):
+    """Reject every node that is not plain arithmetic on numbers"""
+
+    def __init__(self, variables: FrozenSet[str]):
+        self.variables = variables
+
+    def generic_visit(self, node):
+        raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculatorError(f"Unsupported constant: {node.value!r}")
+
+    def visit_Name(self, node):
+        if node.id not in CONSTANTS and node.id not in self.variables:
+            raise CalculatorError(f"Unknown name: {node.id}")
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in BINARY_OPERATORS:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_UnaryOp(self, node):
+        if type(node.op) not in UNARY_OPERATORS:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        self.visit(node.operand)
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise CalculatorError("Only whitelisted math functions can be called")
+        if node.keywords:
+            raise CalculatorError("Keyword arguments are not supported")
+        for arg in node.args:
+            self.visit(arg)
+
+
+class _ConstantFolder(ast.NodeTransformer):
+    """Evaluate every subtree whose operands are all known at compile time"""
+
+    def visit_Name(self, node):
+        if node.id in CONSTANTS:
+            return ast.copy_location(ast.Constant(CONSTANTS[node.id]), node)
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            value = BINARY_OPERATORS[type(node.op)](node.left.value, node.right.value)
+            return ast.copy_location(ast.Constant(value), node)
+        return node
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.operand, ast.Constant):
+            value = UNARY_OPERATORS[type(node.op)](node.operand.value)
+            return ast.copy_location(ast.Constant(value), node)
+        return node
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if all(isinstance(arg, ast.Constant) for arg in node.args):
+            value = FUNCTIONS[node.func.id](*(arg.value for arg in node.args))
+            return ast.copy_location(ast.Constant(value), node)
+        return node
+
+
+@dataclass(frozen=True)
+class _Bound:
+    bits: float                 # upper bound on log2 of the magnitude
+    is_int: bool
+    exact: Optional[int] = None  # the value itself when it is a small known integer
+
+
+_FLOAT = _Bound(FLOAT_BITS, False)
+
+
+def _int_bound(bits: float, exact: Optional[int] = None) -> _Bound:
+    return _Bound(max(bits, 1), True, exact)
+
+
+def _pow2(bits: float) -> float:
+    """2 ** bits as a float, inf where that overflows (never a 1000-bit int)"""
+    return 2.0 ** bits if bits < FLOAT_BITS else math.inf
+
+
+def _known(value: int) -> _Bound:
+    bits = math.log2(abs(value)) if value else 0.0
+    return _Bound(bits, True, value if bits <= 64 else None)
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    peak_bits: float  # largest integer any step can produce, in bits
+    operations: int
+
+
+class _CostEstimator(ast.NodeVisitor):
+    """
+    Bound the integer sizes an expression can produce without computing it
+
+    Floats are cheap whatever their value (they overflow instead of growing), so
+    only integer arithmetic is tracked; small integer subtrees are computed
+    exactly so exponents like `2**-5` or `factorial(20)` are estimated precisely.
+    """
+
+    def __init__(self, max_bits: float):
+        self.max_bits = max_bits
+        self.peak_bits = 0.0
+        self.operations = 0
+
+    def check(self, bound: _Bound) -> _Bound:
+        self.operations += 1
+        if bound.is_int:
+            if bound.bits > self.max_bits:
+                digits = bound.bits / math.log2(10)
+                size = f"about {digits:.3g} digits" if digits < 1e15 else "an astronomically large number"
+                raise CalculatorError(
+                    f"Expression too expensive: result would have {size} (limit {CALCULATOR_MAX_DIGITS})"
+                )
+            self.peak_bits = max(self.peak_bits, bound.bits)
+        return bound
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, int):
+            return self.check(_known(node.value))
+        return self.check(_FLOAT)
+
+    def visit_Name(self, node):
+        # Constants are floats and variables are always bound as floats
+        return self.check(_FLOAT)
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if operand.exact is not None:
+            return self.check(_known(UNARY_OPERATORS[type(node.op)](operand.exact)))
+        return self.check(operand)
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = type(node.op)
+        if not (left.is_int and right.is_int) or op is ast.Div:
+            return self.check(_FLOAT)
+
+        if op is ast.Pow:
+            bound = self._power(left, right)
+        elif op in (ast.Add, ast.Sub):
+            bound = _int_bound(max(left.bits, right.bits) + 1)
+        elif op is ast.Mult:
+            bound = _int_bound(left.bits + right.bits)
+        elif op is ast.FloorDiv:
+            bound = _int_bound(left.bits)
+        else:  # ast.Mod
+            bound = _int_bound(right.bits)
+
+        if bound.is_int and bound.bits <= 64 and left.exact is not None and right.exact is not None:
+            try:
+                return self.check(_known(BINARY_OPERATORS[op](left.exact, right.exact)))
+            except ZeroDivisionError:
+                pass
+        return self.check(bound)
+
+    def _power(self, base: _Bound, exponent: _Bound) -> _Bound:
+        if exponent.exact is not None and exponent.exact < 0:
+            return _FLOAT
+        if base.exact is not None and base.exact in (-1, 0, 1):
+            return _int_bound(1)
+        if exponent.exact is not None:
+            return _int_bound(base.bits * exponent.exact)
+        return _int_bound(base.bits * _pow2(exponent.bits))
+
+    def visit_Call(self, node):
+        name = node.func.id
+        args = [self.visit(arg) for arg in node.args]
+        if name not in INTEGER_FUNCTIONS:
+            return self.check(_FLOAT)
+        if name == "factorial":
+            if not args or not args[0].is_int:
+                return self.check(_FLOAT)
+            n = args[0].exact
+            if n is not None and n < 0:
+                raise CalculatorError("factorial() not defined for negative values")
+            if n is None:
+                n = _pow2(args[0].bits)
+            try:
+                bits = math.lgamma(n + 1) / math.log(2) if n < math.inf else math.inf
+            except OverflowError:
+                bits = math.inf
+            return self.check(_int_bound(bits))
+        if name in ("floor", "ceil", "round"):
+            # Converting a float yields an integer as large as the float
+            return self.check(_int_bound(args[0].bits if args else 1))
+        if all(arg.is_int for arg in args):
+            return self.check(_int_bound(max((arg.bits for arg in args), default=1)))
+        return self.check(_FLOAT)
+
+
+def _depth(tree: ast.AST) -> int:
+    """Nesting depth of a tree, measured without recursion"""
+    deepest, stack = 0, [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+    return deepest
+
+
+def _parse(source: str, variables: FrozenSet[str]) -> ast.Expression:
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"Invalid expression: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise CalculatorError("Expression is nested too deeply") from None
+    # The validator, estimator and folder recurse once per level
+    if _depth(tree) > MAX_DEPTH:
+        raise CalculatorError(f"Expression is nested more than {MAX_DEPTH} levels deep")
+    _Validator(variables).visit(tree)
+    return tree
+
+
+def _estimate(tree: ast.Expression) -> CostEstimate:
+    estimator = _CostEstimator(MAX_RESULT_BITS)
+    estimator.visit(tree)
+    return CostEstimate(estimator.peak_bits, estimator.operations)
+
+
+@lru_cache(maxsize=CALCULATOR_CACHE_SIZE)
+def _estimate_exact(expression: str, variables: FrozenSet[str]) -> CostEstimate:
+    return _estimate(_parse(normalize_expression(expression), variables))
+
+
+def estimate_cost(expression: str, variables: Iterable[str] = ()) -> CostEstimate:
+    """Statically bound the cost of an expression; raises CalculatorError over the limits"""
+    return _estimate_exact(expression, frozenset(variables))
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    source: str
+    code: CodeType
+    variables: FrozenSet[str]
+    is_constant: bool
+    constant: Any = None
+
+    def evaluate_vectorized(self, **arrays: Any) -> Any:
+        """Evaluate over NumPy arrays of bindings (broadcast like NumPy operators)"""
+        np = require_numpy()
+        if self.is_constant:
+            return np.full(np.broadcast(*arrays.values()).shape if arrays else (), float(self.constant))
+        missing = self.variables.difference(arrays)
+        if missing:
+            raise CalculatorError(f"Missing values for: {', '.join(sorted(missing))}")
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in arrays.items()}
+        try:
+            # Overflow and domain errors become inf/nan entries instead of failing the batch
+            with np.errstate(all="ignore"):
+                return eval(self.code, _vector_globals(), arrays)
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise CalculatorError(str(e)) from None
+
+    def evaluate(self, **bindings: Any) -> Any:
+        """Evaluate the expression with the given variable bindings"""
+        if self.is_constant:
+            return self.constant
+        missing = self.variables.difference(bindings)
+        if missing:
+            raise CalculatorError(f"Missing values for: {', '.join(sorted(missing))}")
+        try:
+            # Variables are floats so their cost stays bounded whatever the value
+            bindings = {name: float(value) for name, value in bindings.items()}
+            return eval(self.code, _EVAL_GLOBALS, bindings)
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise CalculatorError(str(e)) from None
+
+
+def require_numpy():
+    """Import NumPy on first use; it is only needed by the batch calculator"""
+    try:
+        import numpy
+    except ImportError:
+        raise CalculatorError("Batch evaluation requires NumPy (pip install numpy)") from None
+    return numpy
+
+
+@lru_cache(maxsize=None)
+def _vector_globals() -> Dict[str, Any]:
+    """Globals for vectorized evaluation: NumPy ufuncs in place of scalar math"""
+    np = require_numpy()
+
+    def unsupported(name):
+        def function(*args):
+            raise CalculatorError(f"{name}() is not supported in batch evaluation")
+        return function
+
+    functions = {name: getattr(np, name) for name in (
+        "sqrt", "exp", "log", "log10", "log2", "sin", "cos", "tan", "floor", "ceil"
+    )}
+    functions.update({
+        "abs": np.abs,
+        "round": np.round,
+        "asin": np.arcsin,
+        "acos": np.arccos,
+        "atan": np.arctan,
+        "min": lambda *args: np.minimum.reduce(np.broadcast_arrays(*args)),
+        "max": lambda *args: np.maximum.reduce(np.broadcast_arrays(*args)),
+        "factorial": unsupported("factorial"),
+    })
+    return {"__builtins__": {}, **functions, **CONSTANTS}
+
+
+def _free_variables(tree: ast.AST) -> FrozenSet[str]:
+    return frozenset(
+        node.id for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and node.id not in FUNCTIONS and node.id not in CONSTANTS
+    )
+
+
+@lru_cache(maxsize=CALCULATOR_CACHE_SIZE)
+def _compile_normalized(source: str, variables: FrozenSet[str]) -> CompiledExpression:
+    tree = _parse(source, variables)
+    # Constant folding computes the expression, so bound its cost first
+    _estimate(tree)
+    try:
+        tree = ast.fix_missing_locations(_ConstantFolder().visit(tree))
+    except (ArithmeticError, ValueError, TypeError) as e:
+        raise CalculatorError(str(e)) from None
+
+    code = compile(tree, "<calculator>", "eval")
+    if isinstance(tree.body, ast.Constant):
+        return CompiledExpression(source, code, frozenset(), True, tree.body.value)
+    return CompiledExpression(source, code, _free_variables(tree), False)
+
+
+@lru_cache(maxsize=CALCULATOR_CACHE_SIZE)
+def _compile_exact(expression: str, variables: FrozenSet[str]) -> CompiledExpression:
+    # Exact repeats skip normalization; near-identical ones share the normalized entry
+    reserved = variables.intersection(FUNCTIONS).union(variables.intersection(CONSTANTS))
+    if reserved:
+        raise CalculatorError(f"Reserved names cannot be variables: {', '.join(sorted(reserved))}")
+    return _compile_normalized(normalize_expression(expression), variables)
+
+
+def compile_expression(expression: str, variables: Iterable[str] = ()) -> CompiledExpression:
+    """Compile an expression (cached); `variables` lists the allowed free names"""
+    return _compile_exact(expression, frozenset(variables))
+
+
+def evaluate(expression: str) -> Number:
+    """Evaluate a constant arithmetic expression"""
+    return compile_expression(expression).evaluate()
+
+
+def _limit_worker_cpu(seconds: int) -> None:
+    """Let the kernel kill the worker (SIGXCPU) once this task used `seconds` of CPU"""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _evaluate_in_worker(expression: str, cpu_seconds: int) -> Number:
+    _limit_worker_cpu(cpu_seconds)
+    return evaluate(expression)
+
+
+_worker_pool: Optional["ProcessPoolExecutor"] = None
+# Completes once the pool has a running worker
+_worker_pool_ready: Optional["Future"] = None
+
+
+def _get_worker_pool() -> Tuple["ProcessPoolExecutor", "Future"]:
+    global _worker_pool, _worker_pool_ready
+    if _worker_pool is None:
+        # Imported on first use: most processes never evaluate an expensive expression
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Workers must not inherit the server's threads and event loop
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _worker_pool = ProcessPoolExecutor(
+            max_workers=CALCULATOR_WORKERS,
+            mp_context=multiprocessing.get_context(method)
+        )
+        # A no-op job starts a worker, so calculations need not wait for one
+        _worker_pool_ready = _worker_pool.submit(int)
+    return _worker_pool, _worker_pool_ready
+
+
+def _kill_worker_pool() -> None:
+    """Terminate the workers outright; a running big-integer operation cannot be cancelled"""
+    global _worker_pool, _worker_pool_ready
+    pool, _worker_pool, _worker_pool_ready = _worker_pool, None, None
+    if pool is None:
+        return
+    # ProcessPoolExecutor has no public API to kill busy workers
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def evaluate_async(expression: str) -> Number:
+    """
+    Evaluate an expression without ever blocking the event loop for long
+
+    Cheap expressions (the vast majority) are evaluated inline. Expensive ones
+    run in a worker process that is killed when it exceeds its budget.
+    """
+    estimate = estimate_cost(expression)
+    if estimate.peak_bits <= CALCULATOR_INLINE_BITS or CALCULATOR_ISOLATION != "process":
+        return evaluate(expression)
+
+    from concurrent.futures.process import BrokenProcessPool
+    loop = asyncio.get_running_loop()
+    try:
+        pool, ready = _get_worker_pool()
+        # Starting the worker process is not part of the calculation's time budget
+        await asyncio.shield(asyncio.wrap_future(ready))
+        future = loop.run_in_executor(pool, _evaluate_in_worker, expression, CALCULATOR_CPU_SECONDS)
+    except (OSError, NotImplementedError) as e:
+        # No multiprocessing support (some serverless runtimes): the static bound still applies
+        logger.warning(f"Calculator worker unavailable, evaluating inline: {e}")
+        return evaluate(expression)
+    except BrokenProcessPool:
+        _kill_worker_pool()
+        raise CalculatorError("Calculation worker could not be started") from None
+
+    try:
+        return await asyncio.wait_for(future, timeout=CALCULATOR_TIMEOUT)
+    except asyncio.TimeoutError:
+        _kill_worker_pool()
+        raise CalculatorError(f"Calculation exceeded the {CALCULATOR_TIMEOUT:g}s time budget") from None
+    except BrokenProcessPool:
+        _kill_worker_pool()
+        raise CalculatorError("Calculation worker was terminated (CPU budget exceeded)") from None
+
+
+def cache_info():
+    """Hit/miss statistics of the compiled-expression cache"""
+    return _compile_normalized.cache_info()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Response compression codecs and Accept-Encoding negotiation
+
+gzip is always available; brotli ("br") when the brotli package is installed.
+Dynamic responses use fast settings; static payloads, compressed once, use
+the strongest ones.
+
+Configuration:
+    MCP_GZIP_LEVEL      gzip level for dynamic responses (1-9, default 6)
+    MCP_BROTLI_QUALITY  brotli quality for dynamic responses (0-11, default 4)
+"""
+
+import gzip
+import os
+import zlib
+from typing import Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+MCP_GZIP_LEVEL = int(os.getenv("MCP_GZIP_LEVEL", "6"))
+MCP_BROTLI_QUALITY = int(os.getenv("MCP_BROTLI_QUALITY", "4"))
+
+# Supported encodings, preferred first when the client weighs them equally
+AVAILABLE = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Encodings listed in an Accept-Encoding header with their q-values"""
+    qualities = {}
+    for part in (header or "").split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+    return qualities
+
+
+def negotiate(header: Optional[str], offered: Iterable[str] = AVAILABLE) -> Optional[str]:
+    """The offered encoding the client accepts with the highest q-value (ties go to the first offered)"""
+    qualities = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a whole body; `static` trades time for size (payloads compressed once)"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if static else MCP_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if static else MCP_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Incremental compressor whose output for each chunk can be sent immediately"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=MCP_BROTLI_QUALITY)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(MCP_GZIP_LEVEL, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.finish()
+        return self._compressor.compress(chunk) + self._compressor.flush()
@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Persistent trigram index over file paths for the file_search tool
+
+The index lives in a single file that is memory-mapped at load time: sorted
+path strings, a sorted trigram key table, a sorted file extension table and
+array-backed postings (uint32 doc ids). A query is turned into its trigrams
+(plus the extension of `file_type`), the matching posting lists are intersected
+starting from the shortest, and the surviving candidates are verified with a
+substring check, so a lookup touches only a few pages of the index no matter
+how many files it covers. Queries too short for a trigram search a lowercased copy
+of the path blob instead of decoding every path. At most
+FILE_SEARCH_MAX_CANDIDATES candidates are verified per query, and queries that
+may verify many run in a thread, off the event loop.
+
+Changes reported by a filesystem watcher (watchfiles) are applied to a small
+in-memory overlay (added paths and tombstones for removed ones). Once enough
+changes pile up they are merged into a new index file; the tree is never
+rescanned for that. An index file loaded from disk may predate changes made
+while no server was watching, so the tree is rescanned once in the background
+and the result swapped in.
+
+Configuration:
+    FILE_SEARCH_ROOTS         directories to index, separated by os.pathsep
+    FILE_SEARCH_INDEX         index file location
+    FILE_SEARCH_IGNORE        comma-separated directory names to skip
+    FILE_SEARCH_WATCH         keep the index current with a watcher (true/false)
+    FILE_SEARCH_MAX_RESULTS   files listed per query
+    FILE_SEARCH_COMPACT_AFTER overlay changes before merging into the index file
+    FILE_SEARCH_MAX_CANDIDATES most candidates verified per query (more makes the answer partial)
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+FILE_SEARCH_ROOTS = [
+    os.path.abspath(root) for root in os.getenv("FILE_SEARCH_ROOTS", "").split(os.pathsep) if root
+]
+FILE_SEARCH_INDEX = os.getenv(
+    "FILE_SEARCH_INDEX", os.path.join(tempfile.gettempdir(), "gpt_tools_file_index.bin")
+)
+FILE_SEARCH_IGNORE = frozenset(
+    name.strip() for name in os.getenv(
+        "FILE_SEARCH_IGNORE", ".git,.hg,.svn,node_modules,__pycache__,.venv,.mypy_cache,.pytest_cache"
+    ).split(",") if name.strip()
+)
+FILE_SEARCH_WATCH = os.getenv("FILE_SEARCH_WATCH", "true").lower() == "true"
+FILE_SEARCH_MAX_RESULTS = int(os.getenv("FILE_SEARCH_MAX_RESULTS", "50"))
+FILE_SEARCH_COMPACT_AFTER = int(os.getenv("FILE_SEARCH_COMPACT_AFTER", "5000"))
+FILE_SEARCH_MAX_CANDIDATES = int(os.getenv("FILE_SEARCH_MAX_CANDIDATES", "200000"))
+
+# Queries expected to verify more candidates than this run in a thread
+_INLINE_CANDIDATES = 2000
+
+_MAGIC = b"TRIGRAM3"
+# magic, byte order, roots length, docs, trigram keys, postings, path blob length
+# (stored twice: as is and ASCII-lowercased), extensions length, extensions, extension postings
+_HEADER = struct.Struct("<8sQQQQQQQQQ")
+_LITTLE_ENDIAN = 1 if sys.byteorder == "little" else 2
+
+
+def trigrams(text: str) -> Set[bytes]:
+    """Distinct 3-byte sequences of the lowercased UTF-8 text"""
+    data = text.lower().encode("utf-8")
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def _pad(size: int) -> int:
+    return (8 - size % 8) % 8
+
+
+def _matches_type(path: str, file_type: Optional[str]) -> bool:
+    return not file_type or path.lower().endswith("." + file_type.lower().lstrip("."))
+
+
+def extension(path: str) -> str:
+    """Lowercased text after the last dot of the file name ("" without one)"""
+    name = os.path.basename(path).lower()
+    return name.rpartition(".")[2] if "." in name else ""
+
+
+def _type_extension(file_type: str) -> str:
+    # "tar.gz" is looked up as "gz"; the full suffix is checked on verification
+    return file_type.lower().lstrip(".").rpartition(".")[2]
+
+
+class _Budget:
+    """Candidates a query may still verify"""
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+        self.exhausted = False
+
+    def spend(self) -> bool:
+        if self.remaining <= 0:
+            self.exhausted = True
+            return False
+        self.remaining -= 1
+        return True
+
+
+class TrigramIndex:
+    """Immutable, memory-mapped index file"""
+
+    def __init__(self, path: str):
+        self.file_path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Index file is empty: {path}") from None
+        view = memoryview(self._mmap)
+        self._views = [view]
+        (magic, byte_order, roots_length, docs, keys, postings, blob_length,
+         extensions_length, extensions, extension_postings) = _HEADER.unpack_from(view)
+        if magic != _MAGIC or byte_order != _LITTLE_ENDIAN:
+            self.close()
+            raise ValueError(f"Not a compatible index file: {path}")
+
+        offset = _HEADER.size
+
+        def take(length: int, fmt: Optional[str] = None) -> memoryview:
+            nonlocal offset
+            section = view[offset:offset + length]
+            offset += length + _pad(length)
+            if fmt:
+                self._views.append(section)
+                section = section.cast(fmt)
+            self._views.append(section)
+            return section
+
+        self.roots: List[str] = json.loads(bytes(take(roots_length)).decode("utf-8"))
+        self._root_ids = take(2 * docs, "H")
+        self._path_offsets = take(8 * (docs + 1), "Q")
+        self._blob = take(blob_length)
+        # The same paths with ASCII lowercased (same offsets), searched by short queries
+        self._folded_start = offset
+        take(blob_length)
+        self._keys = take(4 * keys, "I")
+        self._key_offsets = take(8 * (keys + 1), "Q")
+        self._postings = take(4 * postings, "I")
+        self.extensions: List[str] = json.loads(bytes(take(extensions_length)).decode("utf-8"))
+        self._extension_offsets = take(8 * (extensions + 1), "Q")
+        self._extension_postings = take(4 * extension_postings, "I")
+
+    def __len__(self) -> int:
+        return len(self._root_ids)
+
+    def relative_path(self, doc_id: int) -> str:
+        return bytes(self._blob[self._path_offsets[doc_id]:self._path_offsets[doc_id + 1]]).decode("utf-8")
+
+    def entry(self, doc_id: int) -> Tuple[int, str]:
+        return self._root_ids[doc_id], self.relative_path(doc_id)
+
+    def path(self, doc_id: int) -> str:
+        return os.path.join(self.roots[self._root_ids[doc_id]], self.relative_path(doc_id))
+
+    def locate(self, path: str) -> Optional[Tuple[int, str]]:
+        """Split an absolute path into (root id, relative path) if it is under a root"""
+        for root_id, root in enumerate(self.roots):
+            relative = os.path.relpath(path, root)
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                return root_id, relative
+        return None
+
+    def find(self, path: str) -> Optional[int]:
+        """Doc id of an absolute path, by binary search over the sorted paths"""
+        located = self.locate(path)
+        if located is None:
+            return None
+        doc_id = bisect_left(range(len(self)), located, key=self.entry)
+        if doc_id < len(self) and self.entry(doc_id) == located:
+            return doc_id
+        return None
+
+    def prefix_range(self, directory: str) -> Tuple[int, int]:
+        """Doc ids [lo, hi) of every file under a directory"""
+        located = self.locate(directory)
+        if located is None:
+            return 0, 0
+        root_id, relative = located
+        prefix = "" if relative == os.curdir else relative + os.sep
+        ids = range(len(self))
+        lo = bisect_left(ids, (root_id, prefix), key=self.entry)
+        # Every path under the prefix sorts before prefix + a character above any path char
+        hi = bisect_left(ids, (root_id, prefix + "\U0010ffff"), key=self.entry)
+        return lo, hi
+
+    def _posting(self, gram: bytes) -> Optional[memoryview]:
+        key = int.from_bytes(gram, "big")
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+        return self._postings[self._key_offsets[i]:self._key_offsets[i + 1]]
+
+    def _extension_posting(self, ext: str) -> Optional[memoryview]:
+        i = bisect_left(self.extensions, ext)
+        if i == len(self.extensions) or self.extensions[i] != ext:
+            return None
+        return self._extension_postings[self._extension_offsets[i]:self._extension_offsets[i + 1]]
+
+    def plan(self, query: str, file_type: Optional[str] = None) -> Optional[List[memoryview]]:
+        """
+        Posting lists to intersect for a query, shortest first
+
+        None means nothing can match; an empty list that the index cannot narrow
+        the query down (no trigram and no file type).
+        """
+        postings = []
+        for gram in trigrams(query):
+            posting = self._posting(gram)
+            if posting is None:
+                return None
+            postings.append(posting)
+        if file_type and _type_extension(file_type):
+            posting = self._extension_posting(_type_extension(file_type))
+            if posting is None:
+                return None
+            postings.append(posting)
+        postings.sort(key=len)
+        return postings
+
+    def cost(self, query: str, file_type: Optional[str] = None) -> int:
+        """Most candidates the query can produce"""
+        postings = self.plan(query, file_type)
+        if postings is None:
+            return 0
+        return len(postings[0]) if postings else len(self)
+
+    def candidates(self, query: str, file_type: Optional[str] = None,
+                   budget: Optional[_Budget] = None) -> Iterator[int]:
+        """Doc ids whose path contains every trigram of the query and has the file type's extension"""
+        postings = self.plan(query, file_type)
+        if postings is None:
+            return
+        if not postings:
+            yield from self._scan(query, budget)
+            return
+        shortest, others = postings[0], postings[1:]
+        for doc_id in shortest:
+            if budget is not None and not budget.spend():
+                return
+            for other in others:
+                i = bisect_left(other, doc_id)
+                if i == len(other) or other[i] != doc_id:
+                    break
+            else:
+                yield doc_id
+
+    def _scan(self, query: str, budget: Optional[_Budget]) -> Iterator[int]:
+        """Doc ids that may contain a query too short for a trigram"""
+        if not query or not query.isascii():
+            # Every path matches an empty query; non-ASCII case folding needs the decoded path
+            for doc_id in range(len(self)):
+                if budget is not None and not budget.spend():
+                    return
+                yield doc_id
+            return
+        # The lowercased path blob is searched directly (ASCII folding suffices for an ASCII query)
+        needle = query.lower().encode("ascii")
+        start = self._folded_start
+        end = start + len(self._blob)
+        position = 0
+        while True:
+            found = self._mmap.find(needle, start + position, end)
+            if found < 0:
+                return
+            doc_id = bisect_right(self._path_offsets, found - start) - 1
+            if budget is not None and not budget.spend():
+                return
+            # Matches spanning two paths are weeded out by verification
+            yield doc_id
+            # The rest of the path can only repeat the match
+            position = self._path_offsets[doc_id + 1]
+
+    def close(self) -> None:
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A posting slice from an unfinished query still references the map;
+            # it is unmapped when that slice is garbage collected
+            pass
+        self._file.close()
+
+    @staticmethod
+    def write(path: str, roots: List[str], entries: Iterable[Tuple[int, str]]) -> None:
+        """Build an index file from (root id, relative path) entries, atomically"""
+        entries = sorted(set(entries))
+        root_ids = array("H", (root_id for root_id, _ in entries))
+        path_offsets = array("Q", [0])
+        blob = bytearray()
+        postings: Dict[bytes, array] = {}
+        extension_postings: Dict[str, array] = {}
+        for doc_id, (_, relative) in enumerate(entries):
+            blob += relative.encode("utf-8")
+            path_offsets.append(len(blob))
+            for gram in trigrams(relative):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(doc_id)
+            ext = extension(relative)
+            if ext:
+                posting = extension_postings.get(ext)
+                if posting is None:
+                    posting = extension_postings[ext] = array("I")
+                posting.append(doc_id)
+
+        keys = array("I")
+        key_offsets = array("Q", [0])
+        all_postings = array("I")
+        for gram in sorted(postings):
+            keys.append(int.from_bytes(gram, "big"))
+            all_postings.extend(postings[gram])
+            key_offsets.append(len(all_postings))
+
+        extensions = sorted(extension_postings)
+        extension_offsets = array("Q", [0])
+        all_extension_postings = array("I")
+        for ext in extensions:
+            all_extension_postings.extend(extension_postings[ext])
+            extension_offsets.append(len(all_extension_postings))
+
+        roots_json = json.dumps(roots).encode("utf-8")
+        extensions_json = json.dumps(extensions).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".file_index-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _LITTLE_ENDIAN, len(roots_json), len(entries),
+                                     len(keys), len(all_postings), len(blob),
+                                     len(extensions_json), len(extensions), len(all_extension_postings)))
+                for section in (roots_json, root_ids.tobytes(), path_offsets.tobytes(), bytes(blob),
+                                bytes(blob).lower(), keys.tobytes(), key_offsets.tobytes(), all_postings.tobytes(),
+                                extensions_json, extension_offsets.tobytes(),
+                                all_extension_postings.tobytes()):
+                    f.write(section)
+                    f.write(b"\0" * _pad(len(section)))
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def scan_roots(roots: List[str], ignore: Iterable[str] = FILE_SEARCH_IGNORE,
+               progress: Optional[Callable[[int], None]] = None) -> Iterator[Tuple[int, str]]:
+    """Walk the roots and yield (root id, relative path) for every file"""
+    ignore = frozenset(ignore)
+    count = 0
+    for root_id, root in enumerate(roots):
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames[:] = [name for name in dirnames if name not in ignore]
+            relative_directory = os.path.relpath(directory, root)
+            for filename in filenames:
+                relative = filename if relative_directory == os.curdir else os.path.join(relative_directory, filename)
+                yield root_id, relative
+                count += 1
+                if progress is not None and count % 10000 == 0:
+                    progress(count)
+
+
+class FileIndex:
+    """Live index: the memory-mapped base plus an overlay of watcher changes"""
+
+    def __init__(self, roots: List[str] = FILE_SEARCH_ROOTS, index_path: str = FILE_SEARCH_INDEX,
+                 ignore: Iterable[str] = FILE_SEARCH_IGNORE):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.index_path = index_path
+        self.ignore = frozenset(ignore)
+        self.base: Optional[TrigramIndex] = None
+        self._added: Dict[str, None] = {}
+        self._deleted_ids: Set[int] = set()
+        self._deleted_ranges: List[Tuple[int, int]] = []
+        # Changes since the base was written, replayed after a compaction
+        self._changes: List[Tuple[str, str]] = []
+        self._ready: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        # Compaction or rescan: one rebuild of the index file at a time
+        self._compaction: Optional[asyncio.Task] = None
+        # Searches running in threads, and replaced bases they may still read
+        self._searches = 0
+        self._retired: List[TrigramIndex] = []
+
+    async def ensure_ready(self, progress: Optional[Callable[[int], None]] = None) -> "FileIndex":
+        """Load the index file (or build it once), then start watching for changes"""
+        if self._ready is None:
+            self._ready = asyncio.ensure_future(self._load(progress))
+        ready = self._ready
+        try:
+            await asyncio.shield(ready)
+        except Exception:
+            # A failed load is retried by the next call instead of being cached
+            if self._ready is ready and ready.done():
+                self._ready = None
+            raise
+        return self
+
+    async def _load(self, progress: Optional[Callable[[int], None]]) -> None:
+        base = None
+        try:
+            base = TrigramIndex(self.index_path)
+            if base.roots != self.roots:
+                base.close()
+                base = None
+        except (OSError, ValueError, struct.error):
+            base = None
+        stale = base is not None
+        if base is None:
+            logger.info(f"Building file index for {self.roots} at {self.index_path}")
+            await asyncio.to_thread(
+                TrigramIndex.write, self.index_path, self.roots,
+                scan_roots(self.roots, self.ignore, progress)
+            )
+            base = TrigramIndex(self.index_path)
+        self.base = base
+        if FILE_SEARCH_WATCH and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+        if stale and self._compaction is None:
+            # Files may have changed while no one was watching; serve the old index meanwhile
+            self._compaction = asyncio.create_task(self.rescan())
+
+    def _is_deleted(self, doc_id: int) -> bool:
+        if doc_id in self._deleted_ids:
+            return True
+        return any(lo <= doc_id < hi for lo, hi in self._deleted_ranges)
+
+    def _ignored(self, path: str) -> bool:
+        return any(part in self.ignore for part in path.split(os.sep))
+
+    def add(self, path: str, record: bool = True) -> None:
+        if self._ignored(path):
+            return
+        if os.path.isdir(path):
+            # A directory moved into the tree: index its files
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames[:] = [name for name in dirnames if name not in self.ignore]
+                for filename in filenames:
+                    self.add(os.path.join(directory, filename), record)
+            return
+        if record:
+            self._changes.append(("add", path))
+        doc_id = self.base.find(path)
+        if doc_id is not None and doc_id in self._deleted_ids:
+            self._deleted_ids.discard(doc_id)
+        elif doc_id is None or self._is_deleted(doc_id):
+            self._added[path] = None
+
+    def remove(self, path: str, record: bool = True) -> None:
+        if record:
+            self._changes.append(("remove", path))
+        self._added.pop(path, None)
+        prefix = path + os.sep
+        for added in [added for added in self._added if added.startswith(prefix)]:
+            del self._added[added]
+        doc_id = self.base.find(path)
+        if doc_id is not None:
+            self._deleted_ids.add(doc_id)
+        else:
+            lo, hi = self.base.prefix_range(path)
+            if lo < hi:
+                self._deleted_ranges.append((lo, hi))
+
+    def search(self, query: str, file_type: Optional[str] = None,
+               limit: int = FILE_SEARCH_MAX_RESULTS) -> Tuple[List[str], bool]:
+        """Return up to `limit` matching paths and whether more matches (may) exist"""
+        return self._search(self.base, self._added, self._deleted_ids, self._deleted_ranges,
+                            query, file_type, limit)
+
+    async def search_async(self, query: str, file_type: Optional[str] = None,
+                           limit: int = FILE_SEARCH_MAX_RESULTS) -> Tuple[List[str], bool]:
+        """search(), in a thread when the query may verify many candidates"""
+        if self.base.cost(query, file_type) <= _INLINE_CANDIDATES:
+            return self.search(query, file_type, limit)
+        # The thread works on a snapshot; the watcher keeps changing the live overlay
+        base = self.base
+        self._searches += 1
+        try:
+            return await asyncio.to_thread(
+                self._search, base, list(self._added), set(self._deleted_ids),
+                list(self._deleted_ranges), query, file_type, limit
+            )
+        finally:
+            self._searches -= 1
+            if not self._searches:
+                self._close_retired()
+
+    @staticmethod
+    def _search(base: TrigramIndex, added: Iterable[str], deleted_ids: Set[int],
+                deleted_ranges: List[Tuple[int, int]], query: str, file_type: Optional[str],
+                limit: int) -> Tuple[List[str], bool]:
+        needle = query.lower()
+        matches: List[str] = []
+        budget = _Budget(FILE_SEARCH_MAX_CANDIDATES)
+        for doc_id in base.candidates(query, file_type, budget):
+            if deleted_ids or deleted_ranges:
+                if doc_id in deleted_ids or any(lo <= doc_id < hi for lo, hi in deleted_ranges):
+                    continue
+            relative = base.relative_path(doc_id)
+            if needle in relative.lower() and _matches_type(relative, file_type):
+                if len(matches) == limit:
+                    return matches, True
+                matches.append(base.path(doc_id))
+        for path in added:
+            located = base.locate(path)
+            relative = located[1] if located else path
+            if needle in relative.lower() and _matches_type(relative, file_type):
+                if len(matches) == limit:
+                    return matches, True
+                matches.append(path)
+        # Candidates left unverified may have matched
+        return matches, budget.exhausted
+
+    def _retire(self, base: TrigramIndex) -> None:
+        """Close a replaced base once no thread is searching it"""
+        self._retired.append(base)
+        if not self._searches:
+            self._close_retired()
+
+    def _close_retired(self) -> None:
+        retired, self._retired = self._retired, []
+        for base in retired:
+            base.close()
+
+    async def _watch(self) -> None:
+        try:
+            from watchfiles import Change, awatch
+        except ImportError:
+            logger.warning("watchfiles is not installed; the file index will not track changes")
+            return
+        try:
+            async for changes in awatch(*self.roots, watch_filter=lambda change, path: not self._ignored(path)):
+                for change, path in changes:
+                    if change == Change.added:
+                        self.add(path)
+                    elif change == Change.deleted:
+                        self.remove(path)
+                if len(self._changes) >= FILE_SEARCH_COMPACT_AFTER and self._compaction is None:
+                    self._compaction = asyncio.create_task(self.compact())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"File index watcher stopped: {e}")
+
+    @staticmethod
+    def _live_entries(base: TrigramIndex, deleted_ids: Set[int], deleted_ranges: List[Tuple[int, int]],
+                      added: List[str]) -> Iterator[Tuple[int, str]]:
+        for doc_id in range(len(base)):
+            if doc_id in deleted_ids or any(lo <= doc_id < hi for lo, hi in deleted_ranges):
+                continue
+            yield base.entry(doc_id)
+        for path in added:
+            located = base.locate(path)
+            if located is not None:
+                yield located
+
+    async def compact(self) -> None:
+        """Merge the overlay into a new index file without rescanning the tree"""
+        # Snapshot the overlay; the merge itself runs off the event loop
+        entries = self._live_entries(
+            self.base, set(self._deleted_ids), list(self._deleted_ranges), list(self._added)
+        )
+        await self._rebuild(entries)
+
+    async def rescan(self) -> None:
+        """Rebuild the index file from a fresh scan of the roots"""
+        logger.info(f"Rescanning {self.roots} for changes made while the index was not watched")
+        await self._rebuild(scan_roots(self.roots, self.ignore))
+
+    async def _rebuild(self, entries: Iterable[Tuple[int, str]]) -> None:
+        """Write `entries` as the new index file, swap it in and replay newer changes"""
+        try:
+            applied = len(self._changes)
+            await asyncio.to_thread(TrigramIndex.write, self.index_path, self.roots, entries)
+            old, self.base = self.base, TrigramIndex(self.index_path)
+            self._retire(old)
+            # Replay what the watcher reported while the new file was being written
+            pending = self._changes[applied:]
+            self._added, self._deleted_ids, self._deleted_ranges, self._changes = {}, set(), [], []
+            for action, path in pending:
+                (self.add if action == "add" else self.remove)(path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The current index stays in use
+            logger.error(f"File index rebuild failed: {e}")
+        finally:
+            self._compaction = None
+
+    async def close(self) -> None:
+        for task in (self._watcher, self._compaction):
+            if task is not None:
+                task.cancel()
+        if self.base is not None:
+            self._retire(self.base)
+            self.base = None
+
+
+_default_index: Optional[FileIndex] = None
+
+
+def default_index() -> FileIndex:
+    """The process-wide index over FILE_SEARCH_ROOTS (created on first use)"""
+    global _default_index
+    if not FILE_SEARCH_ROOTS:
+        raise ValueError("File search is not configured; set FILE_SEARCH_ROOTS")
+    if _default_index is None:
+        _default_index = FileIndex()
+    return _default_index
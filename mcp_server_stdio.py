@@ -5,93 +5,29 @@ Uses stdio transport as expected by Cursor
 """
 
 import asyncio
-import json
+import os
 import sys
 import logging
 from datetime import datetime
 from typing import Dict, Any, List
-import random
 
-# Configure logging
-logging.basicConfig(level=logging.WARNING)
+import serialization
+import structured_logging
+from stdio_transport import MessageTooLarge, StdioTransport
+from tool_registry import progress_notifier, reporting_progress
+from tools import registry
+
+# Configure logging: stdout carries the protocol, so logs go to stderr (off the event loop)
+structured_logging.configure_logging(stream=sys.stderr, default_level="WARNING")
 logger = logging.getLogger(__name__)
 
+# Maximum number of requests handled concurrently
+MCP_STDIO_MAX_INFLIGHT = int(os.getenv("MCP_STDIO_MAX_INFLIGHT", "16"))
+
 class MCPServer:
     def __init__(self):
-        self.tools = {
-            "weather": {
-                "name": "weather",
-                "description": "Get current weather information for any location",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "The city or location to get weather for"
-                        },
-                        "units": {
-                            "type": "string",
-                            "enum": ["celsius", "fahrenheit"],
-                            "default": "celsius",
-                            "description": "Temperature units"
-                        }
-                    },
-                    "required": ["location"]
-                }
-            },
-            "calculator": {
-                "name": "calculator",
-                "description": "Perform mathematical calculations",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "expression": {
-                            "type": "string",
-                            "description": "Mathematical expression to evaluate"
-                        }
-                    },
-                    "required": ["expression"]
-                }
-            },
-            "text_analysis": {
-                "name": "text_analysis",
-                "description": "Analyze text for sentiment, word count, or summary",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "text": {
-                            "type": "string",
-                            "description": "Text to analyze"
-                        },
-                        "analysis_type": {
-                            "type": "string",
-                            "enum": ["sentiment", "word_count", "summary"],
-                            "default": "sentiment",
-                            "description": "Type of analysis to perform"
-                        }
-                    },
-                    "required": ["text"]
-                }
-            },
-            "file_search": {
-                "name": "file_search",
-                "description": "Search for files in the system",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Search query for files"
-                        },
-                        "file_type": {
-                            "type": "string",
-                            "description": "Optional file type filter"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        }
+        # Tools are shared with the HTTP server through the registry in tools.py
+        self.tools = registry
 
     async def handle_initialize(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle MCP initialize request"""
@@ -118,7 +54,7 @@ class MCPServer:
             "jsonrpc": "2.0",
             "id": request.get("id"),
             "result": {
-                "tools": list(self.tools.values())
+                "tools": self.tools.list_tools()
             }
         }
 
@@ -129,29 +65,12 @@ class MCPServer:
         arguments = params.get("arguments", {})
 
         try:
-            if tool_name == "weather":
-                result = await self._weather_tool(arguments)
-            elif tool_name == "calculator":
-                result = await self._calculator_tool(arguments)
-            elif tool_name == "text_analysis":
-                result = await self._text_analysis_tool(arguments)
-            elif tool_name == "file_search":
-                result = await self._file_search_tool(arguments)
-            else:
-                raise ValueError(f"Unknown tool: {tool_name}")
+            result = await self.tools.call(tool_name, arguments)
 
             return {
                 "jsonrpc": "2.0",
                 "id": request.get("id"),
-                "result": {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": result["text"]
-                        }
-                    ],
-                    "isError": False
-                }
+                "result": result
             }
         except Exception as e:
             return {
@@ -163,105 +82,6 @@ class MCPServer:
                 }
             }
 
-    async def _weather_tool(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Weather tool implementation"""
-        location = args.get("location", "Unknown")
-        units = args.get("units", "celsius")
-        
-        # Simulate weather data
-        temperature = random.randint(15, 30)
-        condition = random.choice(["Sunny", "Cloudy", "Rainy", "Partly Cloudy"])
-        humidity = random.randint(40, 80)
-        wind_speed = random.randint(5, 20)
-        
-        temp_symbol = "°C" if units == "celsius" else "°F"
-        
-        return {
-            "text": f"Weather in {location}: {temperature}{temp_symbol}, {condition}. Humidity: {humidity}%, Wind: {wind_speed} km/h"
-        }
-
-    async def _calculator_tool(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculator tool implementation"""
-        expression = args.get("expression", "")
-        
-        try:
-            # Simple calculator (in production, use a proper math parser)
-            result = eval(expression)
-            return {
-                "text": f"{expression} = {result}"
-            }
-        except Exception as e:
-            return {
-                "text": f"Error calculating '{expression}': {str(e)}"
-            }
-
-    async def _text_analysis_tool(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Text analysis tool implementation"""
-        text = args.get("text", "")
-        analysis_type = args.get("analysis_type", "sentiment")
-        
-        if analysis_type == "sentiment":
-            # Simple sentiment analysis
-            positive_words = ["good", "great", "excellent", "amazing", "wonderful", "love", "like", "happy"]
-            negative_words = ["bad", "terrible", "awful", "hate", "dislike", "sad", "angry", "frustrated"]
-            
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            
-            if positive_count > negative_count:
-                sentiment = "Positive"
-            elif negative_count > positive_count:
-                sentiment = "Negative"
-            else:
-                sentiment = "Neutral"
-            
-            return {
-                "text": f"Sentiment Analysis: {sentiment} (Positive: {positive_count}, Negative: {negative_count})"
-            }
-        elif analysis_type == "word_count":
-            word_count = len(text.split())
-            return {
-                "text": f"Word Count: {word_count} words"
-            }
-        elif analysis_type == "summary":
-            words = text.split()
-            if len(words) > 10:
-                summary = " ".join(words[:10]) + "..."
-            else:
-                summary = text
-            return {
-                "text": f"Summary: {summary}"
-            }
-        else:
-            return {
-                "text": f"Unknown analysis type: {analysis_type}"
-            }
-
-    async def _file_search_tool(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """File search tool implementation"""
-        query = args.get("query", "")
-        file_type = args.get("file_type")
-        
-        # Simulate file search
-        mock_files = [
-            f"document_{query}_1.txt",
-            f"report_{query}_2024.pdf",
-            f"data_{query}.csv",
-            f"notes_{query}.md"
-        ]
-        
-        if file_type:
-            mock_files = [f for f in mock_files if f.endswith(f".{file_type}")]
-        
-        result = f"Found {len(mock_files)} files matching '{query}'"
-        if file_type:
-            result += f" with type '{file_type}'"
-        
-        return {
-            "text": result + f"\nFiles: {', '.join(mock_files)}"
-        }
-
     async def handle_ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle ping request"""
         return {
@@ -295,51 +115,102 @@ class MCPServer:
                 }
             }
 
+def _error_response(request_id, code: int, message: str) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+async def write_responses(transport: StdioTransport, queue: asyncio.Queue):
+    """Single writer: the only place that writes to stdout, so lines never interleave"""
+    while True:
+        response = await queue.get()
+        if response is None:
+            break
+        transport.write(serialization.dumps(response))
+        # Batch whatever else is ready, then wait for the client to keep up
+        while not queue.empty():
+            response = queue.get_nowait()
+            if response is None:
+                await transport.drain()
+                return
+            transport.write(serialization.dumps(response))
+        await transport.drain()
+
+async def dispatch(server: MCPServer, request: Dict[str, Any], queue: asyncio.Queue,
+                   inflight: asyncio.Semaphore):
+    """Handle one request and queue its response (correlated by the request id)"""
+    loop = asyncio.get_running_loop()
+    # Progress notifications go through the same writer queue, ahead of the response
+    notify = progress_notifier(request, lambda message: loop.call_soon_threadsafe(queue.put_nowait, message))
+    try:
+        with reporting_progress(notify):
+            response = await server.handle_request(request)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        response = _error_response(request.get("id"), -32603, f"Internal error: {str(e)}")
+    finally:
+        inflight.release()
+
+    # Only send response if there is one (notifications don't have responses)
+    if response is not None:
+        await queue.put(response)
+
 async def main():
     """Main MCP server loop using stdio transport"""
     server = MCPServer()
-    
+    transport = await StdioTransport().open()
+    queue: asyncio.Queue = asyncio.Queue()
+    writer = asyncio.create_task(write_responses(transport, queue))
+    # Requests run concurrently and answer out of order; the semaphore bounds
+    # how many are in flight (reading stops while the limit is reached)
+    inflight = asyncio.Semaphore(MCP_STDIO_MAX_INFLIGHT)
+    tasks = set()
+
     # Read from stdin and write to stdout
     while True:
+        # Read JSON-RPC request from stdin
         try:
-            # Read JSON-RPC request from stdin
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
-                
-            request = json.loads(line.strip())
-            
-            # Handle the request
-            response = await server.handle_request(request)
-            
-            # Only send response if there is one (notifications don't have responses)
-            if response is not None:
-                # Write JSON-RPC response to stdout
-                print(json.dumps(response), flush=True)
-            
-        except json.JSONDecodeError as e:
+            line = await transport.read_message()
+        except MessageTooLarge as e:
+            logger.error(str(e))
+            await queue.put(_error_response(None, -32600, f"Invalid Request: {e}"))
+            continue
+        if line is None:
+            break
+        if not line.strip():
+            continue
+
+        try:
+            request = serialization.loads(line)
+        except ValueError as e:
+            # Invalid JSON or invalid UTF-8 (UnicodeDecodeError is a ValueError)
             logger.error(f"JSON decode error: {e}")
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32700,
-                    "message": "Parse error"
-                }
-            }
-            print(json.dumps(error_response), flush=True)
+            await queue.put(_error_response(None, -32700, "Parse error"))
+            continue
         except Exception as e:
+            # One bad line must never stop the read loop
             logger.error(f"Unexpected error: {e}")
-            error_response = {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }
-            print(json.dumps(error_response), flush=True)
+            await queue.put(_error_response(None, -32603, f"Internal error: {str(e)}"))
+            continue
+        if not isinstance(request, dict):
+            await queue.put(_error_response(None, -32600, "Invalid Request"))
+            continue
+
+        await inflight.acquire()
+        task = asyncio.create_task(dispatch(server, request, queue, inflight))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    # Stdin closed: let in-flight requests finish, then flush the writer
+    if tasks:
+        await asyncio.gather(*tasks)
+    await queue.put(None)
+    await writer
 
 if __name__ == "__main__":
     asyncio.run(main())
-
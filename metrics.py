@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for the HTTP MCP server (served at /metrics)
+
+    mcp_request_duration_seconds{method,tool}   JSON-RPC handling latency histogram
+    mcp_jsonrpc_errors_total{method,code}       JSON-RPC error responses by code
+    mcp_http_timeouts_total{route}              requests answered with 504
+    mcp_http_requests_in_flight                 HTTP requests being processed
+    mcp_event_loop_lag_seconds                  how late a periodic loop callback ran
+    mcp_result_cache_requests_total{tool,result} result cache hits and misses
+    mcp_cache_bytes{cache}                       size of an in-process cache (memory backend)
+    mcp_cache_evictions_total{cache}             entries evicted to stay under a cache's size cap
+
+Under several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers (wiped before each start): every worker then
+writes its samples there and /metrics aggregates all of them, whichever
+worker serves the scrape.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Seconds between event-loop lag probes
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+
+# Label values are limited to known methods and registered tools so that
+# arbitrary client input cannot create new time series
+KNOWN_METHODS = frozenset({"initialize", "notifications/initialized", "tools/list", "tools/call", "ping"})
+
+REQUEST_LATENCY = Histogram(
+    "mcp_request_duration_seconds",
+    "Time to handle one JSON-RPC request",
+    ["method", "tool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+JSONRPC_ERRORS = Counter(
+    "mcp_jsonrpc_errors_total",
+    "JSON-RPC error responses",
+    ["method", "code"],
+)
+TIMEOUTS = Counter(
+    "mcp_http_timeouts_total",
+    "HTTP requests that hit the server-side timeout (504)",
+    ["route"],
+)
+IN_FLIGHT = Gauge(
+    "mcp_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    multiprocess_mode="livesum",
+)
+LOOP_LAG = Gauge(
+    "mcp_event_loop_lag_seconds",
+    "Delay of the last periodic event-loop probe beyond its schedule",
+    multiprocess_mode="livemax",
+)
+
+CACHE_REQUESTS = Counter(
+    "mcp_result_cache_requests_total",
+    "Result cache lookups by tool and outcome",
+    ["tool", "result"],
+)
+CACHE_BYTES = Gauge(
+    "mcp_cache_bytes",
+    "Bytes held by an in-process cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+CACHE_EVICTIONS = Counter(
+    "mcp_cache_evictions_total",
+    "Cache entries evicted to stay under the size cap",
+    ["cache"],
+)
+CACHE_ERRORS = Counter(
+    "mcp_cache_errors_total",
+    "Cache reads and writes that failed and were treated as misses or skipped",
+    ["cache"],
+)
+
+
+def _labels(message: Dict[str, Any], tools) -> tuple:
+    method = message.get("method")
+    if method not in KNOWN_METHODS:
+        return "other", ""
+    if method != "tools/call":
+        return method, ""
+    params = message.get("params")
+    tool = params.get("name") if isinstance(params, dict) else None
+    return method, tool if isinstance(tool, str) and tool in tools else "unknown"
+
+
+def observe_jsonrpc(message: Dict[str, Any], response: Optional[Dict[str, Any]], duration: float,
+                    tools, failed: bool = False) -> None:
+    """Record one handled JSON-RPC message; `failed` means the handler raised (-32603)"""
+    method, tool = _labels(message, tools)
+    REQUEST_LATENCY.labels(method, tool).observe(duration)
+    if failed:
+        JSONRPC_ERRORS.labels(method, "-32603").inc()
+    elif isinstance(response, dict) and isinstance(response.get("error"), dict):
+        JSONRPC_ERRORS.labels(method, str(response["error"].get("code"))).inc()
+
+
+def count_error(method: str, code: int) -> None:
+    """Record an error raised before a message could be dispatched (parse errors and the like)"""
+    JSONRPC_ERRORS.labels(method, str(code)).inc()
+
+
+async def monitor_loop_lag(interval: float = METRICS_LOOP_LAG_INTERVAL) -> None:
+    """Sleep `interval` seconds at a time and record how late each wakeup is"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.set(max(0.0, loop.time() - start - interval))
+
+
+def render() -> bytes:
+    """Current metrics in the Prometheus text format (aggregated over workers when multiprocess)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate (call at shutdown)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Result cache for deterministic tools
+
+Tools registered with a `cache_ttl` are pure functions of their arguments, so
+their results are cached under a canonical key: a SHA-256 of the tool name and
+the validated arguments (defaults filled in, keys sorted). Equivalent calls
+such as {"text": "x"} and {"text": "x", "analysis_type": "sentiment"} share an
+entry. Results are stored serialized: the size accounting is exact and a
+cached result can never be mutated by a caller. Storage is a cache backend
+(see cache_backends, CACHE_BACKEND), capped at RESULT_CACHE_MAX_BYTES: with the
+shared or sqlite backend, every worker sees the results computed by the others.
+The cache is best-effort: a failing backend makes lookups misses, never errors.
+
+The HTTP server reports hits and misses in an X-Cache header (see tracking());
+both servers count them in metrics.
+
+Configuration:
+    RESULT_CACHE_ENABLED    true/false
+    RESULT_CACHE_MAX_BYTES  total size of cached results
+"""
+
+import hashlib
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+import metrics
+import serialization
+from cache_backends import CacheBackend, create_backend
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+HIT = "HIT"
+MISS = "MISS"
+
+# Hit/miss outcomes of the cacheable tool calls made while handling the current request
+_statuses: ContextVar[Optional[List[str]]] = ContextVar("result_cache_statuses", default=None)
+
+
+def cache_key(tool_name: str, arguments: BaseModel) -> str:
+    """Canonical key: tool name plus the validated, normalized arguments"""
+    canonical = serialization.dumps([tool_name, arguments.model_dump(mode="json")], sort_keys=True)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, store: Optional[CacheBackend] = None, enabled: bool = RESULT_CACHE_ENABLED):
+        self.store = store if store is not None else create_backend("results", RESULT_CACHE_MAX_BYTES)
+        self.enabled = enabled
+
+    def get(self, tool_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result, or None; records the outcome for X-Cache and metrics"""
+        value = self.store.try_get(key)
+        result = None
+        if value is not None:
+            try:
+                result = serialization.loads(value)
+            except ValueError:
+                # A damaged entry is a miss; the fresh result replaces it
+                pass
+        status = HIT if result is not None else MISS
+        metrics.CACHE_REQUESTS.labels(tool_name, status.lower()).inc()
+        statuses = _statuses.get()
+        if statuses is not None:
+            statuses.append(status)
+        return result
+
+    def set(self, key: str, result: Dict[str, Any], ttl: float) -> None:
+        # Error results are not worth keeping
+        if not result.get("isError"):
+            self.store.try_set(key, serialization.dumps(result), ttl)
+
+
+@contextmanager
+def tracking():
+    """
+    Collect hit/miss outcomes of the tool calls made within the block (including
+    batch entries running in child tasks); yields the list they are appended to
+    """
+    statuses: List[str] = []
+    token = _statuses.set(statuses)
+    try:
+        yield statuses
+    finally:
+        _statuses.reset(token)
+
+
+def x_cache_header(statuses: List[str]) -> Optional[str]:
+    """X-Cache value for a response: HIT only if every cacheable call was served from cache"""
+    if not statuses:
+        return None
+    return HIT if all(status == HIT for status in statuses) else MISS
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def default_cache() -> ResultCache:
+    """The process-wide result cache"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
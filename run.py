@@ -1,33 +1,105 @@
 #!/usr/bin/env python3
 """
-Simple script to run the MCP server with proper configuration
+Production launcher for the MCP server (uvicorn, one process per CPU by default)
+
+Configuration (environment or .env):
+    HOST, PORT                 listen address
+    DEBUG                      auto-reload, debug logging and a single worker
+    WORKERS                    worker processes (default: CPU count)
+    KEEP_ALIVE                 seconds an idle keep-alive connection stays open
+    BACKLOG                    pending connections the listening socket queues
+    GRACEFUL_SHUTDOWN_TIMEOUT  seconds in-flight requests get to finish on shutdown
+    MAX_REQUESTS               recycle a worker after this many requests (0 never)
+    MAX_REQUESTS_JITTER        random extra requests per worker, so they do not all recycle at once
+    ACCESS_LOG                 per-request uvicorn access log (default off; tool calls are logged)
+
+uvloop and httptools are used when installed. With several workers,
+PROMETHEUS_MULTIPROC_DIR is created (a temporary directory if unset) and
+its sample files (*.db) are removed before they start, so /metrics aggregates
+all of them. Worker recycling relies on uvicorn (0.30+) restarting the
+workers that exit.
 """
 
-import uvicorn
+import importlib.util
+import inspect
 import os
+import tempfile
+
+import uvicorn
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+
+def available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Give the workers an empty shared directory for their Prometheus samples"""
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if workers <= 1 and not path:
+        return
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"gpt-tools-metrics-{os.getpid()}")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    os.makedirs(path, exist_ok=True)
+    # Samples of previous runs would be added to the new ones; nothing else
+    # in the directory is touched, since it may be shared with other files
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
 if __name__ == "__main__":
     # Get configuration from environment variables
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
     debug = os.getenv("DEBUG", "False").lower() == "true"
-    
+    # Reloading only works with a single process
+    workers = 1 if debug else int(os.getenv("WORKERS", os.cpu_count() or 1))
+    keep_alive = int(os.getenv("KEEP_ALIVE", "5"))
+    backlog = int(os.getenv("BACKLOG", "2048"))
+    graceful_shutdown = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+    max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+    max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+    access_log = os.getenv("ACCESS_LOG", "true" if debug else "false").lower() == "true"
+    loop = "uvloop" if available("uvloop") else "asyncio"
+    http = "httptools" if available("httptools") else "h11"
+
+    options = dict(
+        host=host,
+        port=port,
+        reload=debug,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=keep_alive,
+        backlog=backlog,
+        timeout_graceful_shutdown=graceful_shutdown,
+        limit_max_requests=max_requests or None,
+        access_log=access_log,
+        log_level="info" if not debug else "debug",
+    )
+    if max_requests and max_requests_jitter:
+        if "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters:
+            options["limit_max_requests_jitter"] = max_requests_jitter
+        else:
+            print("MAX_REQUESTS_JITTER needs a newer uvicorn; ignored")
+
+    prepare_metrics_dir(workers)
+
     print(f"Starting MCP Server...")
     print(f"Host: {host}")
     print(f"Port: {port}")
     print(f"Debug: {debug}")
+    print(f"Workers: {workers} ({loop} loop, {http} parser)")
+    print(f"Keep-alive: {keep_alive}s, backlog: {backlog}, graceful shutdown: {graceful_shutdown}s")
+    if max_requests:
+        print(f"Worker recycling: every {max_requests} (+0-{max_requests_jitter}) requests")
     print(f"Health check: http://{host}:{port}/health")
     print(f"API docs: http://{host}:{port}/docs")
     print(f"Tools manifest: http://{host}:{port}/mcp/tools")
-    
-    uvicorn.run(
-        "app:app",
-        host=host,
-        port=port,
-        reload=debug,
-        log_level="info" if not debug else "debug"
-    )
+
+    uvicorn.run("app:app", **options)
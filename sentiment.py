@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Lexicon-based sentiment scoring for the text_analysis tool
+
+Text is tokenized once on word boundaries and every token is looked up in a hash
+table of term weights, so scoring is a single pass whose cost does not depend on
+the size of the lexicon. Negators ("not", "never", "don't", ...) flip the sign
+of the next few terms within the same clause.
+
+A production lexicon can be loaded from a file (SENTIMENT_LEXICON) with one
+single-word `term<TAB>weight` pair per line; `#` starts a comment.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+# Path of a term/weight lexicon file replacing the built-in word lists
+SENTIMENT_LEXICON = os.getenv("SENTIMENT_LEXICON")
+# Number of tokens after a negator whose polarity is flipped
+SENTIMENT_NEGATION_WINDOW = int(os.getenv("SENTIMENT_NEGATION_WINDOW", "3"))
+
+DEFAULT_WEIGHTS = {
+    "good": 1.0, "great": 1.0, "excellent": 1.0, "amazing": 1.0,
+    "wonderful": 1.0, "love": 1.0, "like": 1.0, "happy": 1.0,
+    "bad": -1.0, "terrible": -1.0, "awful": -1.0, "hate": -1.0,
+    "dislike": -1.0, "sad": -1.0, "angry": -1.0, "frustrated": -1.0,
+}
+
+DEFAULT_NEGATORS = frozenset({
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor",
+    "without", "hardly", "cannot",
+})
+
+# Words (with inner apostrophes, so "don't" stays one token) or clause punctuation
+_TOKEN = re.compile(r"(?P<word>[^\W_]+(?:['\u2019][^\W_]+)*)|(?P<stop>[.!?;:,])")
+
+
+class SentimentScorer:
+    """Accumulates a sentiment score over one or more pieces of text"""
+
+    def __init__(self, lexicon: "Lexicon"):
+        self.lexicon = lexicon
+        self.score = 0.0
+        self.positive_count = 0
+        self.negative_count = 0
+        # Remaining tokens affected by the last negator
+        self._negated = 0
+
+    def feed(self, text: str) -> None:
+        """Score a piece of text made of complete tokens"""
+        weights = self.lexicon.weights
+        negators = self.lexicon.negators
+        window = self.lexicon.negation_window
+        for match in _TOKEN.finditer(text.lower()):
+            token = match.group("word")
+            if token is None:
+                # Negation does not cross clause punctuation
+                self._negated = 0
+                continue
+            if token in negators or token.endswith(("n't", "n\u2019t")):
+                self._negated = window
+                continue
+            weight = weights.get(token)
+            if weight is not None:
+                if self._negated:
+                    weight = -weight
+                self.score += weight
+                if weight > 0:
+                    self.positive_count += 1
+                elif weight < 0:
+                    self.negative_count += 1
+            if self._negated:
+                self._negated -= 1
+
+    @property
+    def label(self) -> str:
+        if self.score > 0:
+            return "Positive"
+        if self.score < 0:
+            return "Negative"
+        return "Neutral"
+
+
+class Lexicon:
+    def __init__(self, weights: Dict[str, float], negators: Iterable[str] = DEFAULT_NEGATORS,
+                 negation_window: int = SENTIMENT_NEGATION_WINDOW):
+        self.weights = {term.lower(): float(weight) for term, weight in weights.items()}
+        self.negators = frozenset(negator.lower() for negator in negators)
+        self.negation_window = negation_window
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "Lexicon":
+        """Load `term<TAB>weight` lines (whitespace-separated also accepted)"""
+        weights = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                term, _, weight = line.rpartition("\t") if "\t" in line else line.rpartition(" ")
+                try:
+                    weights[term.strip()] = float(weight)
+                except ValueError:
+                    raise ValueError(f"{path}:{line_number}: invalid lexicon entry: {line!r}") from None
+        return cls(weights, **kwargs)
+
+    def scorer(self) -> SentimentScorer:
+        return SentimentScorer(self)
+
+    def analyze(self, text: str) -> SentimentScorer:
+        scorer = self.scorer()
+        scorer.feed(text)
+        return scorer
+
+
+@lru_cache(maxsize=None)
+def default_lexicon(path: Optional[str] = SENTIMENT_LEXICON) -> Lexicon:
+    """The configured lexicon, loaded once"""
+    if path:
+        return Lexicon.from_file(path)
+    return Lexicon(DEFAULT_WEIGHTS)
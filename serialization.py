@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+JSON encoding and decoding for both MCP servers
+
+Uses orjson when it is installed and the stdlib json module otherwise
+(MCP_JSON_BACKEND=stdlib forces the fallback). Both backends produce the same
+compact UTF-8 output as FastAPI's JSONResponse. Values orjson cannot handle
+(integers beyond 64 bits, for example) are retried with the stdlib, so the
+backend never changes what can be serialized.
+"""
+
+import json
+import os
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+# "auto" (orjson if available), "orjson" or "stdlib"
+MCP_JSON_BACKEND = os.getenv("MCP_JSON_BACKEND", "auto").lower()
+
+orjson = None
+if MCP_JSON_BACKEND != "stdlib":
+    try:
+        import orjson
+    except ImportError:
+        if MCP_JSON_BACKEND == "orjson":
+            raise
+
+BACKEND = "orjson" if orjson is not None else "stdlib"
+
+
+def _stdlib_dumps(content: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (sort_keys gives a canonical form)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+        except TypeError:
+            pass
+    return _stdlib_dumps(content, sort_keys)
+
+
+def _has_float_id(message: Any) -> bool:
+    if isinstance(message, dict):
+        return isinstance(message.get("id"), float)
+    if isinstance(message, list):
+        return any(isinstance(entry, dict) and isinstance(entry.get("id"), float) for entry in message)
+    return False
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON; raises json.JSONDecodeError on invalid input"""
+    if orjson is not None:
+        try:
+            message = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Let the stdlib decide (and produce its usual error message)
+            return json.loads(data)
+        # orjson reads integers beyond 64 bits as floats; re-parse so a JSON-RPC id
+        # is echoed back exactly
+        if not _has_float_id(message):
+            return message
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured backend"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
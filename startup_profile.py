@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Cold-start profiling for the Vercel entry point (MCP_PROFILE_STARTUP=true)
+
+ImportTimer records how long every module imported inside it takes to
+execute, both including its own imports (cumulative) and excluding them
+(self). report() then logs the slowest modules and the time to the first
+response byte of an in-process POST /mcp initialize, the request ChatGPT's
+connector validation starts with.
+
+Configuration:
+    MCP_PROFILE_STARTUP      true/false
+    MCP_PROFILE_STARTUP_TOP  how many modules to report (default 25)
+"""
+
+import asyncio
+import importlib.abc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+MCP_PROFILE_STARTUP = os.getenv("MCP_PROFILE_STARTUP", "false").lower() == "true"
+MCP_PROFILE_STARTUP_TOP = int(os.getenv("MCP_PROFILE_STARTUP_TOP", "25"))
+
+logger = logging.getLogger("mcp.startup")
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader for the duration of one exec_module call"""
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.timer.enter(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.exit()
+            # Leave the real loader behind for importlib.resources and friends
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path finder timing the execution of every module imported while installed"""
+
+    def __init__(self):
+        # name -> (cumulative seconds, self seconds)
+        self.modules: Dict[str, Tuple[float, float]] = {}
+        self._stack: List[List] = []
+        self.elapsed = 0.0
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        name, start, children = self._stack.pop()
+        total = time.perf_counter() - start
+        self.modules[name] = (total, total - children)
+        if self._stack:
+            self._stack[-1][2] += total
+
+    def __enter__(self) -> "ImportTimer":
+        self._start = time.perf_counter()
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        sys.meta_path.remove(self)
+        self.elapsed = time.perf_counter() - self._start
+
+
+async def _first_byte(app) -> float:
+    """Seconds from calling the ASGI app with POST /mcp initialize to its first body byte"""
+    body = (b'{"jsonrpc":"2.0","id":0,"method":"initialize","params":{"protocolVersion":"2024-11-05",'
+            b'"capabilities":{},"clientInfo":{"name":"startup-profile","version":"1.0"}}}')
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/mcp", "raw_path": b"/mcp", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1"))],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    first_byte: Optional[float] = None
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # no disconnect while the response is produced
+
+    async def send(message):
+        nonlocal first_byte
+        if message["type"] == "http.response.body" and message.get("body") and first_byte is None:
+            first_byte = time.perf_counter()
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return (first_byte or time.perf_counter()) - start
+
+
+def first_byte_seconds(app) -> float:
+    """_first_byte() on a private event loop (the importing server may already be running one)"""
+    result: List[float] = []
+    thread = threading.Thread(target=lambda: result.append(asyncio.run(_first_byte(app))))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def report(app, timer: ImportTimer, process_start: float, top: int = MCP_PROFILE_STARTUP_TOP) -> None:
+    """Log the slowest imports and the first-byte time of /mcp"""
+    first_byte = first_byte_seconds(app)
+    slowest = sorted(timer.modules.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    logger.info("cold start profile", extra={"fields": {
+        "import_ms": round(timer.elapsed * 1000, 1),
+        "ready_ms": round((time.perf_counter() - process_start) * 1000, 1),
+        "first_byte_ms": round(first_byte * 1000, 1),
+        "modules_imported": len(timer.modules),
+        "slowest_modules": [
+            {"module": name, "self_ms": round(own * 1000, 2), "cumulative_ms": round(total * 1000, 2)}
+            for name, (total, own) in slowest
+        ],
+    }})
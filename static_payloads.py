@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Pre-serialized response payloads with strong ETags and conditional request support
+
+Payloads that never change within a process (the tool catalog, for example) are
+serialized to bytes once, hashed once and optionally compressed once (gzip, and
+brotli when available), so serving them costs no JSON encoding and no
+compression per request.
+
+Static files (the app manifest, the web interface) are held the same way by
+FilePayload: read once, then revalidated by mtime and size at most every
+MCP_STATIC_REVALIDATE_INTERVAL seconds, or never when pinned
+(MCP_PIN_STATIC_ASSETS, the default on Vercel, where deployed files cannot
+change). Requests in between do no disk I/O at all.
+"""
+
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+import compression
+import serialization
+
+# Precompress static payloads so clients accepting gzip or br get the smaller variant
+PRECOMPRESS_PAYLOADS = os.getenv("MCP_PRECOMPRESS", "true").lower() == "true"
+# Load static files once and never check them again (default on Vercel)
+STATIC_ASSETS_PINNED = os.getenv("MCP_PIN_STATIC_ASSETS", "true" if os.getenv("VERCEL") else "false").lower() == "true"
+# Otherwise, seconds between mtime checks of a static file
+STATIC_REVALIDATE_INTERVAL = float(os.getenv("MCP_STATIC_REVALIDATE_INTERVAL", "1.0"))
+
+
+def dumps_compact(content: Any) -> bytes:
+    """Serialize JSON exactly like the app's JSON responses do"""
+    return serialization.dumps(content)
+
+
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """Weak comparison of an If-None-Match header against any of the given ETags (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = {etag[2:] if etag.startswith("W/") else etag for etag in etags}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in opaque:
+            return True
+    return False
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The ETag of a content-coded variant: the identity ETag suffixed with the coding"""
+    return etag[:-1] + "-" + encoding + '"'
+
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    """Check an If-Modified-Since header against a modification time (whole seconds, as sent)"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return int(last_modified) <= since.timestamp()
+
+
+class CachedPayload:
+    """
+    A response body serialized once and served with strong ETags
+
+    Each content-coded variant is a different representation, so it gets its own
+    ETag (the identity ETag suffixed with "-gzip" or "-br"); a validator for any
+    of them revalidates the payload.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json",
+                 cache_control: str = "no-cache", precompress: bool = PRECOMPRESS_PAYLOADS,
+                 last_modified: Optional[float] = None):
+        self.body = body
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.last_modified = last_modified
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        # Encoding -> compressed body, only for variants that are actually smaller
+        self.variants: Dict[str, bytes] = {}
+        if precompress:
+            for encoding in compression.AVAILABLE:
+                encoded = compression.compress(body, encoding, static=True)
+                if len(encoded) < len(body):
+                    self.variants[encoding] = encoded
+        # Encoding (None for identity) -> ETag of that representation
+        self.etags: Dict[Optional[str], str] = {None: self.etag}
+        for encoding in self.variants:
+            self.etags[encoding] = encoded_etag(self.etag, encoding)
+
+    @classmethod
+    def from_json(cls, content: Any, **kwargs) -> "CachedPayload":
+        return cls(dumps_compact(content), **kwargs)
+
+    def headers(self, extra: Optional[Dict[str, str]] = None, encoding: Optional[str] = None) -> Dict[str, str]:
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": self.cache_control,
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def response(self, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Serve the payload, answering 304 when the client's copy is current"""
+        encoding = compression.negotiate(request.headers.get("accept-encoding"), self.variants) if self.variants else None
+        response_headers = self.headers(headers, encoding)
+        if encoding is not None:
+            # On a 304 too: it tells CompressionMiddleware the validator is already the coded variant's
+            response_headers["Content-Encoding"] = encoding
+        # If-None-Match takes precedence; If-Modified-Since only counts without it (RFC 9110)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, *self.etags.values()):
+                return Response(status_code=304, headers=response_headers)
+        elif self.last_modified is not None and not_modified_since(
+                request.headers.get("if-modified-since"), self.last_modified):
+            return Response(status_code=304, headers=response_headers)
+
+        body = self.body if encoding is None else self.variants[encoding]
+        return Response(content=body, media_type=self.media_type, headers=response_headers)
+
+
+class FilePayload:
+    """
+    A file served from memory as a CachedPayload
+
+    `transform` turns the file's bytes into the body (for example compact JSON).
+    get() returns None while the file does not exist.
+    """
+
+    def __init__(self, path: str, media_type: str, transform: Optional[Callable[[bytes], bytes]] = None,
+                 pinned: bool = STATIC_ASSETS_PINNED, revalidate_interval: float = STATIC_REVALIDATE_INTERVAL,
+                 **payload_options):
+        self.path = path
+        self.media_type = media_type
+        self.transform = transform
+        self.pinned = pinned
+        self.revalidate_interval = revalidate_interval
+        self.payload_options = payload_options
+        self._payload: Optional[CachedPayload] = None
+        self._signature = None
+        self._checked_at: Optional[float] = None
+
+    def get(self) -> Optional[CachedPayload]:
+        now = time.monotonic()
+        if self._checked_at is not None and (self.pinned or now - self._checked_at < self.revalidate_interval):
+            return self._payload
+        self._checked_at = now
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._payload = self._signature = None
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            if self.transform is not None:
+                body = self.transform(body)
+            self._payload = CachedPayload(
+                body, media_type=self.media_type, last_modified=stat.st_mtime, **self.payload_options
+            )
+            self._signature = signature
+        return self._payload
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Newline-delimited message transport over stdin/stdout for the stdio MCP server
+
+stdin and stdout are attached to the event loop as pipes (connect_read_pipe /
+connect_write_pipe), so reading a line and writing a response cost no thread
+hop and no blocking syscall. Writes are buffered by the transport and
+`drain()` applies backpressure when the client stops reading. Messages longer
+than MCP_STDIO_MAX_MESSAGE_SIZE are skipped without being buffered whole.
+
+When stdin/stdout are not pipes (a terminal or a regular file, or a platform
+whose loop has no pipe support) the transport falls back to blocking reads in
+a worker thread and buffered writes to sys.stdout.
+"""
+
+import asyncio
+import logging
+import os
+import stat
+import sys
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Largest accepted message (one JSON-RPC line), in bytes
+MCP_STDIO_MAX_MESSAGE_SIZE = int(os.getenv("MCP_STDIO_MAX_MESSAGE_SIZE", str(16 * 1024 * 1024)))
+
+
+class MessageTooLarge(ValueError):
+    """A message exceeded the size limit; it has been skipped"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Message exceeds {limit} bytes")
+        self.limit = limit
+
+
+def _pipe_like(stream) -> bool:
+    """Whether the loop can watch the stream's descriptor: a FIFO, socket or character device"""
+    try:
+        mode = os.fstat(stream.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode)
+
+
+class StdioTransport:
+    def __init__(self, max_message_size: int = MCP_STDIO_MAX_MESSAGE_SIZE):
+        self.max_message_size = max_message_size
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def open(self) -> "StdioTransport":
+        if not (_pipe_like(sys.stdin) and _pipe_like(sys.stdout)):
+            logger.info("stdin or stdout is not a pipe; using threaded stdio")
+            return self
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=self.max_message_size, loop=loop)
+        # The pipe transports own duplicates of the descriptors: closing one on the
+        # fallback path below must not close the real stdin/stdout. The write side is
+        # connected first so that no input has been consumed if it fails.
+        stdout = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+        try:
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, stdout)
+        except (ValueError, OSError, NotImplementedError) as e:
+            stdout.close()
+            logger.info(f"stdout cannot be used as a pipe ({e}); using threaded stdio")
+            return self
+        stdin = os.fdopen(os.dup(sys.stdin.fileno()), "rb", buffering=0)
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader, loop=loop), stdin)
+        except (ValueError, OSError, NotImplementedError) as e:
+            stdin.close()
+            transport.close()
+            logger.info(f"stdin cannot be used as a pipe ({e}); using threaded stdio")
+            return self
+        self._reader = reader
+        self._writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        return self
+
+    async def read_message(self) -> Optional[bytes]:
+        """Next line without its newline, or None at end of input"""
+        if self._reader is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._read_blocking)
+        try:
+            return (await self._reader.readuntil(b"\n")).rstrip(b"\r\n")
+        except asyncio.IncompleteReadError as e:
+            # Last line without a trailing newline
+            return e.partial.rstrip(b"\r\n") if e.partial else None
+        except asyncio.LimitOverrunError as e:
+            await self._skip(e.consumed)
+            raise MessageTooLarge(self.max_message_size) from None
+
+    async def _skip(self, consumed: int) -> None:
+        # Drop the oversized line chunk by chunk, through its newline
+        while True:
+            await self._reader.readexactly(consumed)
+            try:
+                await self._reader.readuntil(b"\n")
+                return
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    def _read_blocking(self) -> Optional[bytes]:
+        line = sys.stdin.buffer.readline(self.max_message_size + 1)
+        if not line:
+            return None
+        if len(line) > self.max_message_size and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = sys.stdin.buffer.readline(self.max_message_size)
+            raise MessageTooLarge(self.max_message_size)
+        return line.rstrip(b"\r\n")
+
+    def write(self, message: bytes) -> None:
+        """Queue one message; call drain() to flush"""
+        if self._writer is None:
+            sys.stdout.buffer.write(message + b"\n")
+        else:
+            self._writer.write(message + b"\n")
+
+    async def drain(self) -> None:
+        """Wait until the client has taken the buffered output"""
+        if self._writer is None:
+            sys.stdout.buffer.flush()
+        else:
+            await self._writer.drain()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Structured, non-blocking logging for both MCP servers
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so a log call on the event loop never waits on stdout or
+stderr. Each record is one JSON line (or plain text with LOG_FORMAT=text) with
+the fields passed as `extra={"fields": {...}}`.
+
+Per-call logging is guarded with `logger.isEnabledFor(...)` and sampled()
+at the call site, so when the level is off a call costs a level check and
+nothing else: no argument summaries, no formatting, no queue traffic.
+
+Configuration:
+    LOG_LEVEL            DEBUG, INFO, WARNING, ERROR (default INFO; WARNING for stdio)
+    LOG_FORMAT           json or text
+    LOG_SAMPLE_RATE      fraction of successful tool calls that are logged (0.0-1.0)
+    LOG_MAX_ARG_LENGTH   strings in logged arguments are cut to this many characters
+    LOG_REDACT_KEYS      comma-separated argument names whose values are never logged
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Optional, TextIO
+
+LOG_LEVEL = os.getenv("LOG_LEVEL")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_MAX_ARG_LENGTH = int(os.getenv("LOG_MAX_ARG_LENGTH", "200"))
+LOG_REDACT_KEYS = frozenset(
+    key.strip().lower() for key in os.getenv(
+        "LOG_REDACT_KEYS", "password,passwd,secret,token,api_key,apikey,appid,authorization,cookie"
+    ).split(",") if key.strip()
+)
+
+# Containers are summarized this many levels deep, and lists to this many items
+_MAX_DEPTH = 3
+_MAX_ITEMS = 10
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and structured fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(stream: TextIO = None, default_level: str = "INFO") -> None:
+    """Route all logging through a queue to `stream` (stdout by default); idempotent"""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    handler.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel((LOG_LEVEL or default_level).upper())
+    if root.level > logging.DEBUG:
+        # The weather provider's client would otherwise log every upstream request
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def sampled(rate: float = LOG_SAMPLE_RATE) -> bool:
+    """Whether this occurrence of a high-volume event should be logged"""
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def summarize(value: Any, depth: int = 0) -> Any:
+    """Copy of tool arguments that is safe and small enough to log"""
+    if isinstance(value, str):
+        if len(value) > LOG_MAX_ARG_LENGTH:
+            return f"{value[:LOG_MAX_ARG_LENGTH]}...(+{len(value) - LOG_MAX_ARG_LENGTH} chars)"
+        return value
+    if isinstance(value, dict):
+        if depth >= _MAX_DEPTH:
+            return f"<object with {len(value)} keys>"
+        summary = {
+            key: "[redacted]" if str(key).lower() in LOG_REDACT_KEYS else summarize(item, depth + 1)
+            for key, item in list(value.items())[:_MAX_ITEMS]
+        }
+        if len(value) > _MAX_ITEMS:
+            summary["..."] = f"+{len(value) - _MAX_ITEMS} keys"
+        return summary
+    if isinstance(value, (list, tuple)):
+        if depth >= _MAX_DEPTH:
+            return f"<array of {len(value)} items>"
+        items = [summarize(item, depth + 1) for item in value[:_MAX_ITEMS]]
+        if len(value) > _MAX_ITEMS:
+            items.append(f"...(+{len(value) - _MAX_ITEMS} items)")
+        return items
+    return value
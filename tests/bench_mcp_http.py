@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Load test / benchmark for the HTTP MCP server
+
+Drives app.app in-process through httpx.ASGITransport (no sockets, no live
+deployment), or a running server with --url, with a weighted mix of JSON-RPC
+requests from concurrent closed-loop clients. Reports throughput and
+p50/p95/p99 latency per operation, optionally saves them as JSON and compares
+them with a baseline saved by an earlier run:
+
+    python3 tests/bench_mcp_http.py --requests 5000 --concurrency 20 --output tests/bench_baseline.json
+    python3 tests/bench_mcp_http.py --baseline tests/bench_baseline.json
+    python3 tests/bench_mcp_http.py --url http://127.0.0.1:8000 --mix "tools/list=1,calculator=5"
+
+Exits with status 1 when a baseline is given and an operation regressed beyond
+--max-throughput-drop or --max-latency-increase.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# file_search needs something to index when the app runs in-process
+os.environ.setdefault("FILE_SEARCH_ROOTS", REPO_ROOT)
+sys.path.insert(0, REPO_ROOT)
+
+import httpx
+
+DEFAULT_MIX = ("initialize=1,tools/list=2,calculator=3,calculator_batch=1,"
+               "text_analysis=2,weather=1,file_search=1")
+
+SAMPLE_TEXT = (
+    "The new release is fast and reliable, and the team is happy with the results. "
+    "A few users reported problems with the installer, which was slow on older machines. "
+) * 8
+
+
+def operation_request(operation: str, sequence: int, unique: bool) -> Dict[str, Any]:
+    """JSON-RPC message for one operation; `unique` varies the arguments to defeat the result cache"""
+    n = sequence if unique else 1
+    if operation == "initialize":
+        return {"method": "initialize", "params": {
+            "protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1.0"},
+        }}
+    if operation == "tools/list":
+        return {"method": "tools/list"}
+    arguments = {
+        "calculator": {"expression": f"sqrt({n} ** 2 + 144) * sin(pi / 4) + {n} % 7"},
+        "calculator_batch": {"expression": "a * x ** 2 + b", "variables": {"x": list(range(50)), "a": [n], "b": [1, 2]}},
+        "text_analysis": {"text": f"{SAMPLE_TEXT} Run {n}.", "analysis_type": "sentiment"},
+        "weather": {"location": f"City {n}" if unique else "London", "units": "celsius"},
+        "file_search": {"query": "abcdefghijklmnop"[n % 16] if unique else "py"},
+    }
+    if operation not in arguments:
+        raise ValueError(f"Unknown operation: {operation}")
+    return {"method": "tools/call", "params": {"name": operation, "arguments": arguments[operation]}}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "operation=weight,..." into a dict"""
+    mix = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        operation, separator, weight = entry.partition("=")
+        mix[operation.strip()] = float(weight) if separator else 1.0
+    for operation in mix:
+        operation_request(operation, 0, False)  # validates the name
+    return mix
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput": len(values) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+
+
+def is_error(response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return True
+    body = response.json()
+    return "error" in body or bool(body.get("result", {}).get("isError"))
+
+
+async def run(client: httpx.AsyncClient, schedule: List[str], concurrency: int, unique: bool) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {operation: [] for operation in set(schedule)}
+    errors: Dict[str, int] = {operation: 0 for operation in set(schedule)}
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(schedule):
+            sequence = position
+            position += 1
+            operation = schedule[sequence]
+            message = {"jsonrpc": "2.0", "id": sequence, **operation_request(operation, sequence, unique)}
+            start = time.perf_counter()
+            response = await client.post("/mcp", json=message)
+            latencies[operation].append(time.perf_counter() - start)
+            if is_error(response):
+                errors[operation] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    everything = [latency for values in latencies.values() for latency in values]
+    return {
+        "overall": summarize(everything, sum(errors.values()), elapsed),
+        "operations": {
+            operation: summarize(latencies[operation], errors[operation], elapsed) for operation in sorted(latencies)
+        },
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_throughput_drop: float,
+            max_latency_increase: float) -> List[str]:
+    """Print a comparison table and return the regressions found"""
+    regressions = []
+    print(f"\n{'operation':<18} {'req/s':>9} {'base':>9} {'change':>8} {'p95 ms':>8} {'base':>8} {'change':>8}")
+    rows = {"overall": (results["overall"], baseline.get("overall"))}
+    rows.update({name: (stats, baseline.get("operations", {}).get(name))
+                 for name, stats in results["operations"].items()})
+    for name, (current, base) in rows.items():
+        if not base:
+            print(f"{name:<18} {current['throughput']:>9.0f} {'-':>9}")
+            continue
+        throughput_change = current["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        latency_change = current["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        print(f"{name:<18} {current['throughput']:>9.0f} {base['throughput']:>9.0f} {throughput_change:>+7.1%} "
+              f"{current['p95_ms']:>8.2f} {base['p95_ms']:>8.2f} {latency_change:>+7.1%}")
+        if throughput_change < -max_throughput_drop:
+            regressions.append(f"{name}: throughput {throughput_change:+.1%}")
+        if latency_change > max_latency_increase:
+            regressions.append(f"{name}: p95 latency {latency_change:+.1%}")
+    return regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="MCP HTTP server load test")
+    parser.add_argument("--url", help="benchmark a running server instead of app.app in-process")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation=weight list (default {DEFAULT_MIX})")
+    parser.add_argument("--unique", action="store_true", help="vary tool arguments so results are not cache hits")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.15)
+    parser.add_argument("--max-latency-increase", type=float, default=0.25)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    schedule = rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+    warmup = rng.choices(list(mix), weights=list(mix.values()), k=args.warmup)
+
+    if args.url:
+        transport: Optional[httpx.AsyncBaseTransport] = None
+        base_url = args.url.rstrip("/")
+    else:
+        import app as app_module
+        transport = httpx.ASGITransport(app=app_module.app)
+        base_url = "http://bench"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        await run(client, warmup, min(args.concurrency, max(1, args.warmup)), args.unique)
+        results = await run(client, schedule, args.concurrency, args.unique)
+
+    results["meta"] = {
+        "target": args.url or "in-process",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "unique": args.unique,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    print(f"{'operation':<18} {'requests':>8} {'errors':>6} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in [("overall", results["overall"]), *results["operations"].items()]:
+        print(f"{name:<18} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput']:>9.0f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_throughput_drop, args.max_latency_increase)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions beyond the thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
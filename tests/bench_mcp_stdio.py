@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the stdio MCP server
+
+Spawns mcp_server_stdio.py as a subprocess, the way Cursor does, and streams N
+JSON-RPC requests (same operation mix syntax as bench_mcp_http.py) into its
+stdin while keeping up to --depth requests in flight. Measures:
+
+    startup       process start to the first (initialize) response
+    throughput    requests per second over the run
+    latency       p50/p95/p99 per operation, from write to matching response
+    rss           resident memory after initialize, at the end, and its peak (Linux)
+
+    python3 tests/bench_mcp_stdio.py --requests 20000 --depth 32 --output stdio.json
+    python3 tests/bench_mcp_stdio.py --requests 20000 --depth 32 --baseline stdio.json
+
+Results are printed as a table and saved as JSON with --output; --baseline
+compares with an earlier run and exits with status 1 on regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from bench_mcp_http import DEFAULT_MIX, REPO_ROOT, compare, operation_request, parse_mix, summarize
+
+SERVER = os.path.join(REPO_ROOT, "mcp_server_stdio.py")
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, from /proc (None where unavailable)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="stdio MCP server throughput benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--depth", type=int, default=16, help="requests in flight (pipelining depth)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation=weight list (default {DEFAULT_MIX})")
+    parser.add_argument("--unique", action="store_true", help="vary tool arguments so results are not cache hits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rss-interval", type=float, default=0.25, help="seconds between RSS samples")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.15)
+    parser.add_argument("--max-latency-increase", type=float, default=0.25)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    schedule = random.Random(args.seed).choices(list(mix), weights=list(mix.values()), k=args.requests)
+
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, SERVER,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        limit=64 * 1024 * 1024, cwd=REPO_ROOT, env=os.environ.copy(),
+    )
+
+    def send(message: Dict[str, Any]) -> None:
+        process.stdin.write(json.dumps(message).encode() + b"\n")
+
+    async def receive() -> Dict[str, Any]:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                raise RuntimeError("server exited before answering every request")
+            message = json.loads(line)
+            if "id" in message:  # skip notifications (progress)
+                return message
+
+    send({"jsonrpc": "2.0", "id": "init", **operation_request("initialize", 0, False)})
+    await process.stdin.drain()
+    await receive()
+    startup = time.perf_counter() - started
+    send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    rss_start = rss_bytes(process.pid)
+    rss_samples: List[int] = [rss_start] if rss_start is not None else []
+
+    sent_at: Dict[int, float] = {}
+    latencies: Dict[str, List[float]] = {operation: [] for operation in set(schedule)}
+    errors: Dict[str, int] = {operation: 0 for operation in set(schedule)}
+    window = asyncio.Semaphore(args.depth)
+
+    async def writer():
+        for sequence, operation in enumerate(schedule):
+            await window.acquire()
+            sent_at[sequence] = time.perf_counter()
+            send({"jsonrpc": "2.0", "id": sequence, **operation_request(operation, sequence, args.unique)})
+            await process.stdin.drain()
+
+    async def reader():
+        for _ in schedule:
+            response = await receive()
+            sequence = response["id"]
+            operation = schedule[sequence]
+            latencies[operation].append(time.perf_counter() - sent_at.pop(sequence))
+            if "error" in response or response.get("result", {}).get("isError"):
+                errors[operation] += 1
+            window.release()
+
+    async def sample_rss():
+        while True:
+            await asyncio.sleep(args.rss_interval)
+            rss = rss_bytes(process.pid)
+            if rss is not None:
+                rss_samples.append(rss)
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.perf_counter()
+    await asyncio.gather(writer(), reader())
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    rss_end = rss_bytes(process.pid)
+
+    process.stdin.close()
+    await process.wait()
+
+    everything = [latency for values in latencies.values() for latency in values]
+    results: Dict[str, Any] = {
+        "overall": summarize(everything, sum(errors.values()), elapsed),
+        "operations": {
+            operation: summarize(latencies[operation], errors[operation], elapsed) for operation in sorted(latencies)
+        },
+        "startup_ms": startup * 1000,
+        "rss": {
+            "start_bytes": rss_start,
+            "end_bytes": rss_end,
+            "peak_bytes": max(rss_samples + ([rss_end] if rss_end else [])) if rss_samples else None,
+            "growth_bytes": rss_end - rss_start if rss_start is not None and rss_end is not None else None,
+        },
+        "meta": {
+            "target": "stdio",
+            "requests": args.requests,
+            "depth": args.depth,
+            "mix": mix,
+            "unique": args.unique,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+    }
+
+    print(f"startup to first response: {results['startup_ms']:.1f} ms")
+    if rss_start is not None:
+        rss = results["rss"]
+        print(f"RSS: {rss['start_bytes'] / 2**20:.1f} MiB after initialize, {rss['end_bytes'] / 2**20:.1f} MiB at end "
+              f"({rss['growth_bytes'] / 2**20:+.1f} MiB), peak {rss['peak_bytes'] / 2**20:.1f} MiB")
+    print(f"\n{'operation':<18} {'requests':>8} {'errors':>6} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in [("overall", results["overall"]), *results["operations"].items()]:
+        print(f"{name:<18} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput']:>9.0f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_throughput_drop, args.max_latency_increase)
+        if baseline.get("startup_ms") and results["startup_ms"] / baseline["startup_ms"] - 1 > args.max_latency_increase:
+            regressions.append(f"startup: {results['startup_ms']:.0f} ms vs {baseline['startup_ms']:.0f} ms")
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions beyond the thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
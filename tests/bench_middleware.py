@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Before/after benchmark for the timing/timeout middleware
+
+Serves the real app in-process (httpx ASGITransport, no sockets) twice: once
+with the previous @app.middleware("http") implementation (BaseHTTPMiddleware)
+and once with asgi_middleware.TimingTimeoutMiddleware, and reports
+requests per second for small-response endpoints:
+
+    python3 tests/bench_middleware.py [--requests 5000] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import app as app_module
+from asgi_middleware import TimingTimeoutMiddleware
+from serialization import FastJSONResponse
+
+ENDPOINTS = {
+    "GET /ping": ("GET", "/ping", None),
+    "GET /health": ("GET", "/health", None),
+    "POST /mcp ping": ("POST", "/mcp", b'{"jsonrpc":"2.0","id":1,"method":"ping"}'),
+    "POST /mcp calculator": (
+        "POST", "/mcp",
+        b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"calculator","arguments":{"expression":"2+3*4"}}}',
+    ),
+}
+
+
+async def legacy_timeout_middleware(request, call_next):
+    # The middleware as it was before, for comparison
+    start_time = time.time()
+    try:
+        response = await asyncio.wait_for(call_next(request), timeout=5.0)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        response.headers["Connection"] = "keep-alive"
+        response.headers["Keep-Alive"] = "timeout=5, max=1000"
+        return response
+    except asyncio.TimeoutError:
+        return FastJSONResponse(
+            status_code=504,
+            content={"error": "Request timeout", "message": "The request took too long to process"}
+        )
+
+
+def use_middleware(middleware: Middleware) -> None:
+    """Swap the timing middleware of the app and force the stack to be rebuilt"""
+    app = app_module.app
+    app.user_middleware = [
+        middleware if entry.cls in (TimingTimeoutMiddleware, BaseHTTPMiddleware) else entry
+        for entry in app.user_middleware
+    ]
+    app.middleware_stack = None
+
+
+async def requests_per_second(method: str, path: str, body, total: int, concurrency: int) -> float:
+    headers = {"content-type": "application/json"} if body else {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench") as client:
+        async def worker(count: int):
+            for _ in range(count):
+                response = await client.request(method, path, content=body, headers=headers)
+                assert response.status_code == 200, response.status_code
+
+        await worker(50)  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+        return (total // concurrency) * concurrency / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Timing middleware before/after benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    variants = {
+        "before (BaseHTTPMiddleware)": Middleware(BaseHTTPMiddleware, dispatch=legacy_timeout_middleware),
+        "after (raw ASGI)": Middleware(TimingTimeoutMiddleware),
+    }
+    results = {}
+    for name, middleware in variants.items():
+        use_middleware(middleware)
+        for endpoint, (method, path, body) in ENDPOINTS.items():
+            results[name, endpoint] = await requests_per_second(method, path, body, args.requests, args.concurrency)
+
+    before, after = variants
+    print(f"{'endpoint':<24} {'before req/s':>12} {'after req/s':>12} {'change':>8}")
+    for endpoint in ENDPOINTS:
+        old, new = results[before, endpoint], results[after, endpoint]
+        print(f"{endpoint:<24} {old:>12.0f} {new:>12.0f} {(new / old - 1) * 100:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
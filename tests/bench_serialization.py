@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: stdlib json vs the serialization layer (orjson when installed)
+
+Times encoding of typical MCP responses and decoding of typical requests, per
+call, for both backends:
+
+    python3 tests/bench_serialization.py [--number 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import serialization
+from fastapi.responses import JSONResponse
+from tools import registry
+
+PAYLOADS = {
+    "ping response": {"jsonrpc": "2.0", "id": 1, "result": {}},
+    "calculator response": {
+        "jsonrpc": "2.0", "id": 2,
+        "result": {"content": [{"type": "text", "text": "2 + 3 * 4 = 14"}], "isError": False},
+    },
+    "tools/list response": {"jsonrpc": "2.0", "id": 3, "result": {"tools": registry.list_tools()}},
+}
+
+REQUESTS = {
+    "ping request": {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+    "tools/call request": {
+        "jsonrpc": "2.0", "id": 2, "method": "tools/call",
+        "params": {"name": "calculator", "arguments": {"expression": "2 + 3 * 4"}},
+    },
+}
+
+
+def per_call_us(statement, number: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def report(name: str, baseline: float, candidate: float) -> None:
+    print(f"{name:<28} {baseline:>9.2f} {candidate:>9.2f} {baseline / candidate:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization microbenchmark")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    args = parser.parse_args()
+
+    print(f"backend: {serialization.BACKEND}")
+    print(f"{'case':<28} {'stdlib us':>9} {'layer us':>9} {'speedup':>8}")
+    for name, payload in PAYLOADS.items():
+        report(f"encode {name}",
+               per_call_us(lambda: serialization._stdlib_dumps(payload), args.number),
+               per_call_us(lambda: serialization.dumps(payload), args.number))
+        report(f"render {name}",
+               per_call_us(lambda: JSONResponse(payload), args.number),
+               per_call_us(lambda: serialization.FastJSONResponse(payload), args.number))
+    for name, request in REQUESTS.items():
+        data = serialization.dumps(request)
+        report(f"decode {name}",
+               per_call_us(lambda: json.loads(data), args.number),
+               per_call_us(lambda: serialization.loads(data), args.number))
+
+
+if __name__ == "__main__":
+    main()
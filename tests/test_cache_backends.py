@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tests for the cache backends: byte cap, eviction, expiry, sharing between
+processes and best-effort failure handling
+
+    python3 tests/test_cache_backends.py
+"""
+
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import cache_backends
+from cache_backends import CacheBackend, MemoryBackend, SharedMemoryBackend, SQLiteBackend
+from result_cache import ResultCache
+
+
+def _write_entries(backend_class, path, max_bytes, keys, **options):
+    """Child process: store one entry per key"""
+    backend = backend_class("child", path, max_bytes, **options)
+    for key in keys:
+        backend.set(key, key.encode("utf-8") * 10, 60)
+    backend.close()
+
+
+def _sqlite_total(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()[0]
+    finally:
+        db.close()
+
+
+class BackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backends = []
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        shutil.rmtree(self.directory)
+
+    def open(self, backend_class, max_bytes, name="test", **options):
+        if backend_class is MemoryBackend:
+            backend = MemoryBackend(name, max_bytes)
+        else:
+            backend = backend_class(name, os.path.join(self.directory, name), max_bytes, **options)
+        self.backends.append(backend)
+        return backend
+
+    def assertCommonBehaviour(self, backend):
+        backend.set("a", b"1" * 100, 60)
+        self.assertEqual(backend.get("a"), b"1" * 100)
+        backend.set("a", b"2" * 50, 60)
+        self.assertEqual(backend.get("a"), b"2" * 50)
+        backend.delete("a")
+        self.assertIsNone(backend.get("a"))
+        backend.set("short", b"x", 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(backend.get("short"))
+        backend.set("b", b"y", 60)
+        backend.clear()
+        self.assertIsNone(backend.get("b"))
+
+
+class MemoryBackendTest(BackendTestCase):
+    def test_basics(self):
+        self.assertCommonBehaviour(self.open(MemoryBackend, 10_000))
+
+    def test_byte_cap_and_lru_eviction(self):
+        backend = self.open(MemoryBackend, 1000)
+        for key in ("a", "b", "c"):
+            backend.set(key, b"x" * 400, 60)
+        self.assertLessEqual(backend.size, 1000)
+        self.assertIsNone(backend.get("a"))
+        # Reading "b" makes "c" the least recently used
+        backend.get("b")
+        backend.set("d", b"x" * 400, 60)
+        self.assertIsNone(backend.get("c"))
+        self.assertIsNotNone(backend.get("b"))
+        # Values that can never fit are ignored
+        backend.set("huge", b"x" * 2000, 60)
+        self.assertIsNone(backend.get("huge"))
+
+
+class SharedMemoryBackendTest(BackendTestCase):
+    def test_basics(self):
+        self.assertCommonBehaviour(self.open(SharedMemoryBackend, 64 * 1024))
+
+    def test_byte_cap_and_eviction(self):
+        backend = self.open(SharedMemoryBackend, 64 * 1024, slot_bytes=1024)
+        self.assertLessEqual(os.path.getsize(backend.path), 64 * 1024)
+        slots = backend.buckets * backend.ways
+        for i in range(slots * 4):
+            backend.set(f"key-{i}", b"x" * 500, 60)
+        self.assertLessEqual(os.path.getsize(backend.path), 64 * 1024)
+        stored = sum(backend.get(f"key-{i}") is not None for i in range(slots * 4))
+        self.assertLessEqual(stored, slots)
+        # The newest write always survives
+        self.assertIsNotNone(backend.get(f"key-{slots * 4 - 1}"))
+        backend.set("too-big", b"x" * 2048, 60)
+        self.assertIsNone(backend.get("too-big"))
+
+    def test_visible_across_processes(self):
+        backend = self.open(SharedMemoryBackend, 64 * 1024, name="shared")
+        child = multiprocessing.get_context("spawn").Process(
+            target=_write_entries, args=(SharedMemoryBackend, backend.path, 64 * 1024, ["from-child"])
+        )
+        child.start()
+        child.join(30)
+        self.assertEqual(child.exitcode, 0)
+        self.assertEqual(backend.get("from-child"), b"from-child" * 10)
+
+
+class SQLiteBackendTest(BackendTestCase):
+    def test_basics(self):
+        self.assertCommonBehaviour(self.open(SQLiteBackend, 10_000))
+
+    def test_byte_cap_enforced_on_every_write(self):
+        backend = self.open(SQLiteBackend, 10_000)
+        for i in range(100):
+            backend.set(f"key-{i}", b"x" * 900, 60)
+            self.assertLessEqual(_sqlite_total(backend.path), 10_000)
+        # Oldest first
+        self.assertIsNone(backend.get("key-0"))
+        self.assertIsNotNone(backend.get("key-99"))
+        # Updates are accounted for too
+        backend.set("key-99", b"y" * 5000, 60)
+        self.assertLessEqual(_sqlite_total(backend.path), 10_000)
+        self.assertEqual(backend._size(), _sqlite_total(backend.path))
+
+    def run_writers(self, path, max_bytes, keys):
+        context = multiprocessing.get_context("spawn")
+        children = [
+            # A long busy timeout: these tests are about sharing, not skipped writes
+            context.Process(target=_write_entries, args=(SQLiteBackend, path, max_bytes, keys[i::2]),
+                            kwargs={"busy_timeout": 5.0})
+            for i in range(2)
+        ]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join(30)
+            self.assertEqual(child.exitcode, 0)
+
+    def test_visible_across_processes(self):
+        backend = self.open(SQLiteBackend, 1_000_000, name="sqlite")
+        keys = [f"child-{i}" for i in range(50)]
+        self.run_writers(backend.path, 1_000_000, keys)
+        for key in keys:
+            self.assertEqual(backend.get(key), key.encode("utf-8") * 10)
+
+    def test_byte_cap_shared_by_processes(self):
+        backend = self.open(SQLiteBackend, 2000, name="sqlite")
+        self.run_writers(backend.path, 2000, [f"child-{i}" for i in range(200)])
+        # Every writer evicts against the same total
+        self.assertLessEqual(_sqlite_total(backend.path), 2000)
+        self.assertEqual(backend._size(), _sqlite_total(backend.path))
+
+    def test_locked_database_skips_the_write(self):
+        backend = self.open(SQLiteBackend, 10_000, busy_timeout=0.01)
+        backend.set("before", b"1", 60)
+        other = sqlite3.connect(backend.path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            start = time.monotonic()
+            backend.try_set("blocked", b"2", 60)
+            self.assertLess(time.monotonic() - start, 1.0)
+            # Readers are not blocked by the writer in WAL mode
+            self.assertEqual(backend.try_get("before"), b"1")
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+        self.assertIsNone(backend.get("blocked"))
+
+
+class _FailingBackend(CacheBackend):
+    name = "failing"
+
+    def get(self, key):
+        raise OSError("disk unavailable")
+
+    def set(self, key, value, ttl):
+        raise sqlite3.OperationalError("database is locked")
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class BestEffortTest(unittest.TestCase):
+    def test_failures_are_misses(self):
+        cache = ResultCache(store=_FailingBackend(), enabled=True)
+        self.assertIsNone(cache.get("calculator", "key"))
+        cache.set("key", {"content": []}, 60)
+
+    def test_damaged_entry_is_a_miss(self):
+        store = MemoryBackend("damaged", 10_000)
+        store.set("key", b"{not json", 60)
+        self.assertIsNone(ResultCache(store=store, enabled=True).get("calculator", "key"))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            cache_backends.create_backend("x", 1000, backend="redis")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the safe calculator engine (the eval() replacement)
+
+Covers rejected syntax, the static cost limits and cache-key normalization:
+
+    python3 tests/test_calculator_engine.py
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import calculator_engine
+from calculator_engine import CalculatorError, evaluate, normalize_expression
+
+
+class RejectedSyntaxTest(unittest.TestCase):
+    def assertRejected(self, expression):
+        with self.assertRaises(CalculatorError):
+            evaluate(expression)
+
+    def test_attributes(self):
+        self.assertRejected("(1).real")
+        self.assertRejected("pi.__class__")
+
+    def test_imports_and_builtins(self):
+        self.assertRejected("__import__('os')")
+        self.assertRejected("__import__('os').system('true')")
+        self.assertRejected("open('/etc/passwd')")
+        self.assertRejected("eval('1')")
+
+    def test_unknown_names(self):
+        self.assertRejected("x + 1")
+        self.assertRejected("__builtins__")
+
+    def test_non_arithmetic(self):
+        self.assertRejected("'a' * 3")
+        self.assertRejected("[1, 2]")
+        self.assertRejected("lambda: 1")
+        self.assertRejected("True + 1")
+        self.assertRejected("(lambda: 1)()")
+        self.assertRejected("sqrt(x=4)")
+
+    def test_invalid_syntax(self):
+        self.assertRejected("2 +")
+        self.assertRejected("1; 2")
+        self.assertRejected("2 +\n3")
+
+
+class CostLimitTest(unittest.TestCase):
+    def test_power_towers(self):
+        with self.assertRaisesRegex(CalculatorError, "too expensive"):
+            evaluate("9**9**9")
+        with self.assertRaisesRegex(CalculatorError, "too expensive"):
+            calculator_engine.estimate_cost("2**10**100")
+
+    def test_large_factorial(self):
+        with self.assertRaisesRegex(CalculatorError, "too expensive"):
+            evaluate("factorial(100000)")
+
+    def test_float_sized_integers_do_not_overflow_the_estimate(self):
+        # Bounds of floor() of a huge float must not raise a raw OverflowError
+        for expression in ("2**floor(1e308)", "factorial(floor(1e300))", "factorial(floor(1e308))"):
+            with self.assertRaisesRegex(CalculatorError, "too expensive"):
+                evaluate(expression)
+
+    def test_negative_factorial_is_a_domain_error(self):
+        with self.assertRaisesRegex(CalculatorError, "negative"):
+            evaluate("factorial(-1)")
+
+    def test_length_and_depth(self):
+        with self.assertRaisesRegex(CalculatorError, "longer than"):
+            evaluate("1+" * calculator_engine.CALCULATOR_MAX_LENGTH + "1")
+        with self.assertRaisesRegex(CalculatorError, "nested"):
+            evaluate("+".join(["1"] * 400))
+
+    def test_allowed_expressions(self):
+        self.assertEqual(evaluate("2 ** 10"), 1024)
+        self.assertEqual(evaluate("factorial(10)"), 3628800)
+        self.assertAlmostEqual(evaluate("sqrt(16) + sin(pi / 2)"), 5.0)
+
+    def test_expensive_expression_in_worker(self):
+        self.assertEqual(asyncio.run(calculator_engine.evaluate_async("2**10000 % 7")), 2)
+
+
+class NormalizationTest(unittest.TestCase):
+    def test_insignificant_whitespace(self):
+        self.assertEqual(normalize_expression("  2+3 "), normalize_expression("2 + 3"))
+        self.assertEqual(normalize_expression("abs( -2 )"), normalize_expression("abs(-2)"))
+
+    def test_operators_are_not_merged(self):
+        self.assertNotEqual(normalize_expression("2 * * 3"), normalize_expression("2 ** 3"))
+        self.assertNotEqual(normalize_expression("7 / / 2"), normalize_expression("7 // 2"))
+        with self.assertRaises(CalculatorError):
+            evaluate("2 * * 3")
+        with self.assertRaises(CalculatorError):
+            evaluate("7 / / 2")
+        self.assertEqual(evaluate("2 ** 3"), 8)
+        self.assertEqual(evaluate("7 // 2"), 3)
+
+    def test_cached_forms_do_not_leak(self):
+        # A valid spelling cached first must not make the invalid one succeed
+        evaluate("2**3")
+        with self.assertRaises(CalculatorError):
+            evaluate("2* *3")
+
+
+if __name__ == "__main__":
+    unittest.main()
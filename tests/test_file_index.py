@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Tests for the file_search index: the index file, the watcher overlay
+(additions and tombstones), compaction and reconciliation at load
+
+    python3 tests/test_file_index.py
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import file_index
+from file_index import FileIndex, TrigramIndex
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+class FileIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, "root")
+        self.index_path = os.path.join(self.directory, "index.bin")
+        for relative in ("docs/report.pdf", "docs/notes.txt", "src/main.py", "src/util.py",
+                         "src/pkg/report_tool.py", "archive.tar.gz", "README"):
+            touch(os.path.join(self.root, relative))
+        # The tests stand in for the watcher by calling add()/remove()
+        self._watch, file_index.FILE_SEARCH_WATCH = file_index.FILE_SEARCH_WATCH, False
+        self.loop = asyncio.new_event_loop()
+        self.indexes = []
+
+    def tearDown(self):
+        for index in self.indexes:
+            self.run_async(index.close())
+        file_index.FILE_SEARCH_WATCH = self._watch
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def load(self):
+        index = FileIndex([self.root], self.index_path)
+        self.run_async(index.ensure_ready())
+        # Let a reconciliation started by the load finish
+        if index._compaction is not None:
+            self.run_async(index._compaction)
+        self.indexes.append(index)
+        return index
+
+    def path(self, relative):
+        return os.path.join(self.root, relative)
+
+    def found(self, index, query, file_type=None):
+        return sorted(os.path.relpath(path, self.root) for path in index.search(query, file_type)[0])
+
+
+class SearchTest(FileIndexTestCase):
+    def test_trigram_query(self):
+        index = self.load()
+        self.assertEqual(self.found(index, "report"), ["docs/report.pdf", "src/pkg/report_tool.py"])
+        self.assertEqual(self.found(index, "REPORT"), ["docs/report.pdf", "src/pkg/report_tool.py"])
+        self.assertEqual(self.found(index, "missing"), [])
+
+    def test_file_type_uses_the_extension_table(self):
+        index = self.load()
+        self.assertEqual(self.found(index, "report", "py"), ["src/pkg/report_tool.py"])
+        self.assertEqual(self.found(index, "", ".pdf"), ["docs/report.pdf"])
+        self.assertEqual(self.found(index, "", "tar.gz"), ["archive.tar.gz"])
+        self.assertEqual(self.found(index, "", "doc"), [])
+        # The extension posting alone narrows the candidates
+        self.assertEqual(index.base.cost("", "py"), 3)
+
+    def test_short_queries(self):
+        index = self.load()
+        self.assertEqual(self.found(index, "py", "py"), ["src/main.py", "src/pkg/report_tool.py", "src/util.py"])
+        self.assertEqual(self.found(index, "ME"), ["README"])
+        self.assertEqual(len(self.found(index, "")), 7)
+
+    def test_candidate_cap(self):
+        index = self.load()
+        cap, file_index.FILE_SEARCH_MAX_CANDIDATES = file_index.FILE_SEARCH_MAX_CANDIDATES, 2
+        try:
+            files, truncated = index.search("s")
+        finally:
+            file_index.FILE_SEARCH_MAX_CANDIDATES = cap
+        self.assertLessEqual(len(files), 2)
+        self.assertTrue(truncated)
+
+    def test_async_search_matches_sync(self):
+        index = self.load()
+        inline, file_index._INLINE_CANDIDATES = file_index._INLINE_CANDIDATES, 0
+        try:
+            for query, file_type in (("report", None), ("s", None), ("", "py")):
+                self.assertEqual(self.run_async(index.search_async(query, file_type)),
+                                 index.search(query, file_type))
+        finally:
+            file_index._INLINE_CANDIDATES = inline
+
+
+class OverlayTest(FileIndexTestCase):
+    def test_added_file(self):
+        index = self.load()
+        touch(self.path("src/new_report.md"))
+        index.add(self.path("src/new_report.md"))
+        self.assertIn("src/new_report.md", self.found(index, "report"))
+
+    def test_removed_file_is_tombstoned(self):
+        index = self.load()
+        os.remove(self.path("docs/report.pdf"))
+        index.remove(self.path("docs/report.pdf"))
+        self.assertEqual(self.found(index, "report"), ["src/pkg/report_tool.py"])
+        # Re-created: the tombstone is lifted
+        touch(self.path("docs/report.pdf"))
+        index.add(self.path("docs/report.pdf"))
+        self.assertEqual(self.found(index, "report"), ["docs/report.pdf", "src/pkg/report_tool.py"])
+
+    def test_directory_delete_then_re_add(self):
+        index = self.load()
+        shutil.rmtree(self.path("src"))
+        index.remove(self.path("src"))
+        self.assertEqual(self.found(index, ".py"), [])
+        touch(self.path("src/main.py"))
+        index.add(self.path("src"))
+        self.assertEqual(self.found(index, ".py"), ["src/main.py"])
+
+    def test_added_then_removed(self):
+        index = self.load()
+        touch(self.path("tmp/scratch.txt"))
+        index.add(self.path("tmp"))
+        shutil.rmtree(self.path("tmp"))
+        index.remove(self.path("tmp"))
+        self.assertEqual(self.found(index, "scratch"), [])
+
+
+class CompactionTest(FileIndexTestCase):
+    def test_compaction_merges_the_overlay(self):
+        index = self.load()
+        touch(self.path("docs/summary.txt"))
+        index.add(self.path("docs/summary.txt"))
+        shutil.rmtree(self.path("src/pkg"))
+        index.remove(self.path("src/pkg"))
+        before = self.found(index, "")
+        self.run_async(index.compact())
+        self.assertEqual(self.found(index, ""), before)
+        self.assertEqual(index._added, {})
+        self.assertEqual(index._deleted_ids, set())
+        self.assertEqual(index._deleted_ranges, [])
+        self.assertIn("docs/summary.txt", [index.base.relative_path(i) for i in range(len(index.base))])
+
+    def test_changes_during_compaction_are_replayed(self):
+        index = self.load()
+        os.remove(self.path("src/util.py"))
+        index.remove(self.path("src/util.py"))
+
+        async def compact_with_changes():
+            compaction = asyncio.ensure_future(index.compact())
+            # Let the compaction snapshot the overlay and start writing
+            await asyncio.sleep(0)
+            touch(self.path("src/late.py"))
+            index.add(self.path("src/late.py"))
+            os.remove(self.path("src/main.py"))
+            index.remove(self.path("src/main.py"))
+            shutil.rmtree(self.path("docs"))
+            index.remove(self.path("docs"))
+            await compaction
+
+        self.run_async(compact_with_changes())
+        self.assertEqual(self.found(index, ".py"), ["src/late.py", "src/pkg/report_tool.py"])
+        self.assertEqual(self.found(index, "docs"), [])
+        # Only the changes made during the compaction are left to replay into the next one
+        self.assertEqual(index._changes, [
+            ("add", self.path("src/late.py")), ("remove", self.path("src/main.py")),
+            ("remove", self.path("docs")),
+        ])
+
+
+class ReconcileTest(FileIndexTestCase):
+    def test_changes_made_while_stopped_are_found(self):
+        index = self.load()
+        self.run_async(index.close())
+        # Changed while no server was watching
+        touch(self.path("docs/offline.txt"))
+        os.remove(self.path("src/main.py"))
+
+        reloaded = self.load()
+        self.assertIn("docs/offline.txt", self.found(reloaded, "offline"))
+        self.assertNotIn("src/main.py", self.found(reloaded, ".py"))
+
+    def test_old_index_format_is_rebuilt(self):
+        with open(self.index_path, "wb") as f:
+            f.write(b"TRIGRAM1" + bytes(64))
+        index = self.load()
+        self.assertEqual(self.found(index, "notes"), ["docs/notes.txt"])
+
+    def test_failed_load_is_retried(self):
+        index = FileIndex([self.root], os.path.join("/proc", "no-such-dir", "index.bin"))
+        with self.assertRaises(OSError):
+            self.run_async(index.ensure_ready())
+        index.index_path = self.index_path
+        self.run_async(index.ensure_ready())
+        self.indexes.append(index)
+        self.assertEqual(self.found(index, "notes"), ["docs/notes.txt"])
+
+
+class TrigramIndexTest(unittest.TestCase):
+    def test_scan_skips_matches_spanning_two_paths(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.bin")
+            # Concatenated, "xa" + "aa" contains "aa" across the boundary as well as inside "aa"
+            TrigramIndex.write(path, ["/r"], [(0, "xa"), (0, "aa"), (0, "b")])
+            index = TrigramIndex(path)
+            try:
+                self.assertEqual([index.relative_path(i) for i in index.candidates("aa")][-1], "aa")
+            finally:
+                index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-serialized payloads: per-encoding ETags and conditional requests,
+with and without on-the-fly compression
+
+    python3 tests/test_static_payloads.py
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import compression
+from asgi_middleware import CompressionMiddleware
+from static_payloads import CachedPayload, etag_matches
+
+
+CONTENT = {"tools": [{"name": "tool-%d" % i} for i in range(200)]}
+
+
+class PayloadTestCase(unittest.TestCase):
+    precompress = True
+
+    def setUp(self):
+        self.payload = CachedPayload.from_json(CONTENT, precompress=self.precompress)
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, enabled=True)
+
+        @app.get("/payload")
+        async def serve(request: Request):
+            return self.payload.response(request)
+
+        self.client = TestClient(app)
+
+    def get(self, **headers):
+        return self.client.get("/payload", headers=headers)
+
+
+class CachedPayloadTest(PayloadTestCase):
+
+    def test_each_encoding_has_its_own_etag(self):
+        identity = self.get(**{"Accept-Encoding": "identity"})
+        gzip = self.get(**{"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", identity.headers)
+        self.assertEqual(gzip.headers["content-encoding"], "gzip")
+        self.assertEqual(identity.headers["etag"], self.payload.etag)
+        self.assertEqual(gzip.headers["etag"], self.payload.etag[:-1] + '-gzip"')
+        self.assertEqual(len(set(self.payload.etags.values())), len(self.payload.variants) + 1)
+        if "br" in compression.AVAILABLE:
+            br = self.get(**{"Accept-Encoding": "br"})
+            self.assertEqual(br.headers["etag"], self.payload.etag[:-1] + '-br"')
+
+    def test_any_variant_etag_revalidates(self):
+        for etag in self.payload.etags.values():
+            response = self.get(**{"Accept-Encoding": "gzip", "If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            # The 304 carries the validator of the representation that would have been sent
+            self.assertEqual(response.headers["etag"], self.payload.etags["gzip"])
+        self.assertEqual(self.get(**{"If-None-Match": '"stale"'}).status_code, 200)
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('W/"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('"c"', '"a"', 'W/"c"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"a-gzip"', '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
+
+
+class CompressedOnTheFlyTest(PayloadTestCase):
+    precompress = False
+
+    def test_strong_etag_is_weakened(self):
+        identity = self.get(**{"Accept-Encoding": "identity"})
+        gzip = self.get(**{"Accept-Encoding": "gzip"})
+        self.assertEqual(identity.headers["etag"], self.payload.etag)
+        self.assertEqual(gzip.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.headers["etag"], "W/" + self.payload.etag)
+        revalidated = self.get(**{"Accept-Encoding": "gzip", "If-None-Match": gzip.headers["etag"]})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["etag"], gzip.headers["etag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Local stub of the OpenWeatherMap current-weather endpoint
+
+Run it, then point the weather provider at it:
+
+    python3 tests/weather_stub_server.py --port 8001 --delay 0.2
+    WEATHER_API_KEY=test WEATHER_API_URL=http://127.0.0.1:8001/data/2.5/weather python3 run.py
+
+GET /stats reports how many upstream requests and connections the server has
+seen, which shows the effect of caching, coalescing and keep-alive.
+With --burst, the script instead starts the stub in-process, fires concurrent
+lookups through the provider and prints the counts.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+stats = {"requests": 0, "connections": set()}
+config = {"delay": 0.0}
+
+app = FastAPI(title="Weather stub")
+
+
+@app.get("/data/2.5/weather")
+async def current_weather(request: Request, q: str, appid: str, units: str = "standard"):
+    stats["requests"] += 1
+    stats["connections"].add(request.client.port if request.client else None)
+    if config["delay"]:
+        await asyncio.sleep(config["delay"])
+    if q.lower().startswith("nowhere"):
+        raise HTTPException(status_code=404, detail="city not found")
+    if units != "metric":
+        raise HTTPException(status_code=400, detail="stub only serves metric units")
+    return {
+        "name": q.split(",")[0].strip().title(),
+        "main": {"temp": 21.5, "humidity": 55},
+        "weather": [{"main": "Clear"}],
+        "wind": {"speed": 4.0},
+        "dt": int(time.time()),
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return {"requests": stats["requests"], "connections": len(stats["connections"])}
+
+
+async def burst(port: int, locations: int, calls: int) -> None:
+    from weather_provider import WeatherProvider
+
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    provider = WeatherProvider(api_key="test", api_url=f"http://127.0.0.1:{port}/data/2.5/weather")
+    names = [f"City {i}" for i in range(locations)]
+    start = time.perf_counter()
+    # Every location is asked for `calls` times at once, in mixed case and units
+    await asyncio.gather(*(
+        provider.get(name.upper() if i % 2 else name)
+        for i in range(calls) for name in names
+    ))
+    elapsed = time.perf_counter() - start
+    print(f"{calls * locations} lookups in {elapsed * 1000:.1f} ms")
+    print(f"upstream requests: {stats['requests']}, connections: {len(stats['connections'])}")
+
+    await provider.close()
+    server.should_exit = True
+    await serve
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--burst", action="store_true", help="run a coalescing/caching demo and exit")
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+    config["delay"] = args.delay
+
+    if args.burst:
+        asyncio.run(burst(args.port, args.locations, args.calls))
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=args.port)
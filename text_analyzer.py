@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Incremental text analysis (word count, sentiment, summary) over text chunks
+
+Documents are consumed chunk by chunk: only the current chunk, a partial
+trailing word and the first few summary words are ever held in memory, so
+peak memory per request stays bounded regardless of the document size.
+"""
+
+import asyncio
+import codecs
+import re
+from typing import AsyncIterable, Callable, List, Optional
+
+import sentiment
+
+ANALYSIS_TYPES = ("sentiment", "word_count", "summary")
+# Number of words kept for the summary
+SUMMARY_WORDS = 10
+# Text is processed in slices of this many characters
+CHUNK_SIZE = 64 * 1024
+# A "word" longer than this is split rather than buffered without limit
+MAX_WORD_LENGTH = 64 * 1024
+# analyze_text_async reports progress every this many slices
+PROGRESS_SLICES = 16
+
+# Last whitespace character of a chunk: everything before it is made of complete words
+_LAST_WHITESPACE = re.compile(r"\s(?=\S*\Z)")
+
+
+class TextAnalyzer:
+    """Feed text in chunks of any size, then call result()"""
+
+    def __init__(self, analysis_type: str = "sentiment", lexicon: Optional[sentiment.Lexicon] = None):
+        if analysis_type not in ANALYSIS_TYPES:
+            raise ValueError(f"Unknown analysis type: {analysis_type}")
+        self.analysis_type = analysis_type
+        self.word_count = 0
+        self._scorer = (lexicon or sentiment.default_lexicon()).scorer()
+        self._carry = ""
+        self._summary_words: List[str] = []
+        # Raw text while the document is still short enough to be its own summary
+        self._head: Optional[List[str]] = []
+        self._head_length = 0
+
+    def feed(self, chunk: str) -> None:
+        """Add a chunk; words split across chunk boundaries are handled"""
+        if not chunk:
+            return
+        buffer = self._carry + chunk
+        match = _LAST_WHITESPACE.search(buffer)
+        if match is None and len(buffer) <= MAX_WORD_LENGTH:
+            self._carry = buffer
+            return
+        cut = match.end() if match is not None else len(buffer)
+        self._carry = buffer[cut:]
+        self._process(buffer[:cut])
+
+    def _process(self, text: str) -> None:
+        if self.analysis_type == "sentiment":
+            self._scorer.feed(text)
+            return
+
+        words = text.split()
+        self.word_count += len(words)
+        if self.analysis_type == "summary":
+            if len(self._summary_words) <= SUMMARY_WORDS:
+                self._summary_words.extend(words[:SUMMARY_WORDS + 1 - len(self._summary_words)])
+            if self._head is not None:
+                self._head_length += len(text)
+                if self.word_count <= SUMMARY_WORDS and self._head_length <= MAX_WORD_LENGTH:
+                    self._head.append(text)
+                else:
+                    self._head = None
+
+    def partial(self) -> str:
+        """Interim result over the text processed so far (does not finish the analysis)"""
+        if self.analysis_type == "sentiment":
+            return f"Sentiment so far: {self._scorer.label}"
+        if self.analysis_type == "word_count":
+            return f"Word count so far: {self.word_count}"
+        return f"Summary so far: {' '.join(self._summary_words[:SUMMARY_WORDS])}"
+
+    def result(self) -> str:
+        """Finish the analysis and return the tool's result text"""
+        if self._carry:
+            carry, self._carry = self._carry, ""
+            self._process(carry)
+
+        if self.analysis_type == "sentiment":
+            return f"Sentiment: {self._scorer.label}"
+        if self.analysis_type == "word_count":
+            return f"Word count: {self.word_count}"
+        if self.word_count > SUMMARY_WORDS:
+            summary = " ".join(self._summary_words[:SUMMARY_WORDS]) + "..."
+        elif self._head is not None:
+            summary = "".join(self._head)
+        else:
+            summary = " ".join(self._summary_words)
+        return f"Summary: {summary}"
+
+
+def analyze_text(text: str, analysis_type: str = "sentiment") -> str:
+    """Analyze an in-memory string, slice by slice"""
+    analyzer = TextAnalyzer(analysis_type)
+    for start in range(0, len(text), CHUNK_SIZE):
+        analyzer.feed(text[start:start + CHUNK_SIZE])
+    return analyzer.result()
+
+
+async def analyze_text_async(text: str, analysis_type: str = "sentiment",
+                             progress: Optional[Callable[[int, int, str], None]] = None) -> str:
+    """
+    analyze_text() that yields to the event loop between slices and calls
+    progress(characters done, total characters, partial result) as it goes
+    """
+    analyzer = TextAnalyzer(analysis_type)
+    for count, start in enumerate(range(0, len(text), CHUNK_SIZE), 1):
+        analyzer.feed(text[start:start + CHUNK_SIZE])
+        if count % PROGRESS_SLICES == 0:
+            if progress is not None:
+                progress(min(start + CHUNK_SIZE, len(text)), len(text), analyzer.partial())
+            await asyncio.sleep(0)
+    return analyzer.result()
+
+
+async def analyze_stream(chunks: AsyncIterable[bytes], analysis_type: str = "sentiment",
+                         encoding: str = "utf-8") -> str:
+    """Analyze a stream of encoded byte chunks (request body, upload) incrementally"""
+    analyzer = TextAnalyzer(analysis_type)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    async for chunk in chunks:
+        analyzer.feed(decoder.decode(chunk))
+    analyzer.feed(decoder.decode(b"", final=True))
+    return analyzer.result()
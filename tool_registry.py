@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tool registry shared by the HTTP (app.py) and stdio (mcp_server_stdio.py) MCP servers
+
+Each tool is registered exactly once with its MCP schema, its pydantic argument
+model and its async handler. Dispatch is a single dict lookup.
+
+While a tool runs it can call report_progress(); the transport that dispatched
+the call (SSE on /mcp, or stdio) turns that into notifications/progress when
+the client asked for progress with a progressToken.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+
+from result_cache import ResultCache, cache_key
+
+ToolHandler = Callable[[BaseModel], Awaitable[Dict[str, Any]]]
+# progress, total, message
+ProgressCallback = Callable[[float, Optional[float], Optional[str]], None]
+
+# Progress callback of the tool call running in the current task, if the client wants progress
+_progress_callback: ContextVar[Optional[ProgressCallback]] = ContextVar("tool_progress", default=None)
+
+
+def report_progress(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+    """
+    Report progress (and optionally partial results as `message`) for the current tool call.
+
+    A no-op when nobody is listening. Also callable from worker threads started
+    with asyncio.to_thread, which inherit the caller's context.
+    """
+    callback = _progress_callback.get()
+    if callback is not None:
+        callback(progress, total, message)
+
+
+def progress_enabled() -> bool:
+    """Whether report_progress() will reach the client (skip building messages otherwise)"""
+    return _progress_callback.get() is not None
+
+
+def progress_notifier(request: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> Optional[ProgressCallback]:
+    """
+    ProgressCallback sending MCP notifications/progress through `send`, or None when
+    the request carries no params._meta.progressToken (the client did not ask)
+    """
+    params = request.get("params")
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    token = meta.get("progressToken") if isinstance(meta, dict) else None
+    if token is None:
+        return None
+
+    def notify(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        notification = {"progressToken": token, "progress": progress}
+        if total is not None:
+            notification["total"] = total
+        if message is not None:
+            notification["message"] = message
+        send({"jsonrpc": "2.0", "method": "notifications/progress", "params": notification})
+    return notify
+
+
+@contextmanager
+def reporting_progress(callback: Optional[ProgressCallback]):
+    """Route report_progress() calls made within the block (and tasks it starts) to `callback`"""
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)
+
+
+class UnknownToolError(ValueError):
+    """Raised when a tool name is not present in the registry"""
+
+    def __init__(self, name: Optional[str]):
+        super().__init__(f"Unknown tool: {name}")
+        self.name = name
+
+
+@dataclass
+class Tool:
+    name: str
+    title: str
+    description: str
+    input_schema: Dict[str, Any]
+    input_model: Type[BaseModel]
+    handler: ToolHandler
+    # Seconds a result may be served from the result cache; None = not cacheable
+    cache_ttl: Optional[float] = None
+
+    def describe(self, include_title: bool = False) -> Dict[str, Any]:
+        """Return the MCP tool description used by tools/list and /mcp/tools"""
+        description = {"name": self.name}
+        if include_title:
+            description["title"] = self.title
+        description["description"] = self.description
+        description["inputSchema"] = self.input_schema
+        return description
+
+
+class ToolRegistry:
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self._tools: Dict[str, Tool] = {}
+        self.cache = cache
+        # Bumped on every registration so serialized catalogs can be cached safely
+        self.version = 0
+
+    def register(self, name: str, title: str, description: str,
+                 input_schema: Dict[str, Any], input_model: Type[BaseModel],
+                 cache_ttl: Optional[float] = None, enabled: bool = True):
+        """
+        Decorator registering an async handler as an MCP tool.
+
+        Pass cache_ttl only for tools whose result depends on nothing but their arguments,
+        and enabled=False to leave a tool that is not configured out of the catalog.
+        """
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            if not enabled:
+                return handler
+            if name in self._tools:
+                raise ValueError(f"Tool already registered: {name}")
+            self._tools[name] = Tool(
+                name=name,
+                title=title,
+                description=description,
+                input_schema=input_schema,
+                input_model=input_model,
+                handler=handler,
+                cache_ttl=cache_ttl
+            )
+            self.version += 1
+            return handler
+        return decorator
+
+    def get(self, name: Optional[str]) -> Tool:
+        """Look up a tool by name"""
+        try:
+            return self._tools[name]
+        except KeyError:
+            raise UnknownToolError(name) from None
+
+    def list_tools(self, include_title: bool = False) -> List[Dict[str, Any]]:
+        """Return the MCP descriptions of every registered tool"""
+        return [tool.describe(include_title) for tool in self._tools.values()]
+
+    async def call(self, name: Optional[str], arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Validate the arguments against the tool's model and run its handler"""
+        tool = self.get(name)
+        return await self.run(tool, tool.input_model(**(arguments or {})))
+
+    async def run(self, tool: Tool, input_data: BaseModel) -> Dict[str, Any]:
+        """Run a tool on validated arguments, through the result cache when it is cacheable"""
+        if not tool.cache_ttl or self.cache is None or not self.cache.enabled:
+            return await tool.handler(input_data)
+        key = cache_key(tool.name, input_data)
+        result = self.cache.get(tool.name, key)
+        if result is None:
+            result = await tool.handler(input_data)
+            self.cache.set(key, result, tool.cache_ttl)
+        return result
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(self._tools.values())
+
+    def __len__(self) -> int:
+        return len(self._tools)
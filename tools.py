@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Built-in MCP tools: weather, calculator, text analysis and file search
+
+Every tool is registered once here and served by both the HTTP and stdio servers.
+"""
+
+from typing import Any, Dict, List, Optional, Union
+import io
+import math
+import os
+
+from pydantic import BaseModel
+
+import calculator_engine
+import file_index
+import result_cache
+import text_analyzer
+import weather_provider
+from tool_registry import ToolRegistry, progress_enabled, report_progress
+
+# Results of tools registered with a cache_ttl are cached by canonical arguments
+registry = ToolRegistry(cache=result_cache.default_cache())
+
+# Upper bound on the number of points a single calculator_batch call may evaluate,
+# and on the number of table rows returned (larger batches are summarized)
+CALCULATOR_BATCH_MAX_POINTS = int(os.getenv("CALCULATOR_BATCH_MAX_POINTS", "100000"))
+CALCULATOR_BATCH_MAX_ROWS = int(os.getenv("CALCULATOR_BATCH_MAX_ROWS", "1000"))
+
+# Pydantic models for tool inputs
+class WeatherInput(BaseModel):
+    location: str
+    units: str = "celsius"
+
+class CalculatorInput(BaseModel):
+    expression: str
+
+class RangeInput(BaseModel):
+    start: float
+    stop: float
+    step: Optional[float] = None
+    num: Optional[int] = None
+
+class CalculatorBatchInput(CalculatorInput):
+    variables: Dict[str, Union[List[float], RangeInput]]
+    mode: str = "grid"
+
+class TextAnalysisInput(BaseModel):
+    text: str
+    analysis_type: str = "sentiment"
+
+class FileSearchInput(BaseModel):
+    query: str
+    file_type: Optional[str] = None
+
+def text_result(text: str) -> Dict[str, Any]:
+    """Wrap plain text in an MCP tool result"""
+    return {
+        "content": [{
+            "type": "text",
+            "text": text
+        }],
+        "isError": False
+    }
+
+@registry.register(
+    name="weather",
+    title="Weather Information",
+    description="Get current weather information for any location",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "The city or location to get weather for"
+            },
+            "units": {
+                "type": "string",
+                "enum": ["celsius", "fahrenheit"],
+                "default": "celsius",
+                "description": "Temperature units"
+            }
+        },
+        "required": ["location"]
+    },
+    input_model=WeatherInput
+)
+async def weather(input_data: WeatherInput) -> Dict[str, Any]:
+    """
+    Weather tool implementation
+    """
+    # Pooled client, TTL cache in metric units and coalesced concurrent lookups
+    report = await weather_provider.default_provider().get(input_data.location)
+
+    return text_result(report.describe(input_data.units))
+
+CALCULATOR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "expression": {
+            "type": "string",
+            "description": "Mathematical expression to evaluate"
+        }
+    },
+    "required": ["expression"]
+}
+
+@registry.register(
+    name="calculator",
+    title="Calculator",
+    description="Perform mathematical calculations",
+    input_schema=CALCULATOR_SCHEMA,
+    input_model=CalculatorInput,
+    cache_ttl=3600
+)
+async def calculator(input_data: CalculatorInput) -> Dict[str, Any]:
+    """
+    Calculator tool implementation
+    """
+    # Whitelisted AST compiled once and cached; no arbitrary code execution.
+    # Cost is bounded statically and expensive expressions run in a killable worker.
+    result = await calculator_engine.evaluate_async(input_data.expression)
+
+    return text_result(f"{input_data.expression} = {result}")
+
+def _batch_length(name: str, spec: Union[List[float], RangeInput]) -> int:
+    """Number of values a list or range specification yields, without building it"""
+    if isinstance(spec, RangeInput):
+        if spec.num is not None:
+            if spec.num < 0:
+                raise ValueError(f"Range for '{name}' needs a non-negative num")
+            return spec.num
+        step = spec.step if spec.step is not None else 1.0
+        if step == 0 or (spec.stop - spec.start) / step < 0:
+            raise ValueError(f"Range for '{name}' never reaches its stop value")
+        count = (spec.stop - spec.start) / step + 1e-9
+        if count >= CALCULATOR_BATCH_MAX_POINTS:
+            raise ValueError(f"Range for '{name}' exceeds {CALCULATOR_BATCH_MAX_POINTS} points")
+        # Inclusive of stop, like a spreadsheet fill
+        return math.floor(count) + 1
+    return len(spec)
+
+def _batch_values(np, spec: Union[List[float], RangeInput], count: int):
+    """Turn a list or a range specification into a float array of `count` values"""
+    if isinstance(spec, RangeInput):
+        if spec.num is not None:
+            return np.linspace(spec.start, spec.stop, count)
+        step = spec.step if spec.step is not None else 1.0
+        return spec.start + step * np.arange(count)
+    return np.asarray(spec, dtype=np.float64)
+
+@registry.register(
+    name="calculator_batch",
+    title="Batch Calculator",
+    description="Evaluate one expression over many variable values (lists or ranges) and return a table",
+    input_schema={
+        **CALCULATOR_SCHEMA,
+        "properties": {
+            **CALCULATOR_SCHEMA["properties"],
+            "expression": {
+                **CALCULATOR_SCHEMA["properties"]["expression"],
+                "description": "Mathematical expression using the variables, e.g. 'p * r / (1 - (1 + r)**-n)'"
+            },
+            "variables": {
+                "type": "object",
+                "description": "Values for each variable: a list of numbers or a range {start, stop, step} / {start, stop, num}",
+                "additionalProperties": {
+                    "oneOf": [
+                        {"type": "array", "items": {"type": "number"}},
+                        {
+                            "type": "object",
+                            "properties": {
+                                "start": {"type": "number"},
+                                "stop": {"type": "number"},
+                                "step": {"type": "number"},
+                                "num": {"type": "integer"}
+                            },
+                            "required": ["start", "stop"]
+                        }
+                    ]
+                }
+            },
+            "mode": {
+                "type": "string",
+                "enum": ["grid", "zip"],
+                "default": "grid",
+                "description": "grid: every combination of values; zip: values paired by position"
+            }
+        },
+        "required": CALCULATOR_SCHEMA["required"] + ["variables"]
+    },
+    input_model=CalculatorBatchInput,
+    cache_ttl=3600
+)
+async def calculator_batch(input_data: CalculatorBatchInput) -> Dict[str, Any]:
+    """
+    Batch calculator: compile once, evaluate vectorized with NumPy
+    """
+    np = calculator_engine.require_numpy()
+    names = list(input_data.variables)
+    compiled = calculator_engine.compile_expression(input_data.expression, names)
+    # Sizes are checked before anything is allocated
+    lengths = [_batch_length(name, input_data.variables[name]) for name in names]
+
+    if input_data.mode == "grid":
+        points = math.prod(lengths)
+        if points > CALCULATOR_BATCH_MAX_POINTS:
+            raise ValueError(f"Grid has {points} points, limit is {CALCULATOR_BATCH_MAX_POINTS}")
+    elif input_data.mode == "zip":
+        if len(set(lengths)) > 1:
+            raise ValueError("zip mode needs the same number of values for every variable")
+        if lengths and lengths[0] > CALCULATOR_BATCH_MAX_POINTS:
+            raise ValueError(f"Batch has {lengths[0]} points, limit is {CALCULATOR_BATCH_MAX_POINTS}")
+    else:
+        raise ValueError(f"Unknown mode: {input_data.mode}")
+
+    columns = [_batch_values(np, input_data.variables[name], length) for name, length in zip(names, lengths)]
+    if input_data.mode == "grid":
+        columns = [grid.ravel() for grid in np.meshgrid(*columns, indexing="ij")]
+
+    rows = len(columns[0]) if columns else 1
+    results = np.broadcast_to(compiled.evaluate_vectorized(**dict(zip(names, columns))), (rows,))
+
+    table = io.StringIO()
+    shown = min(rows, CALCULATOR_BATCH_MAX_ROWS)
+    np.savetxt(table, np.column_stack([column[:shown] for column in columns] + [results[:shown]]),
+               fmt="%.10g", delimiter="\t", header="\t".join(names + ["result"]), comments="")
+    text = f"{input_data.expression} over {rows} points\n{table.getvalue().rstrip()}"
+    if shown < rows:
+        with np.errstate(all="ignore"):
+            text += (
+                f"\n... {rows - shown} more rows"
+                f"\nresult min={np.nanmin(results):.10g} max={np.nanmax(results):.10g} mean={np.nanmean(results):.10g}"
+            )
+    return text_result(text)
+
+@registry.register(
+    name="text_analysis",
+    title="Text Analysis",
+    description="Analyze text for sentiment, word count, or summary",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "text": {
+                "type": "string",
+                "description": "Text to analyze"
+            },
+            "analysis_type": {
+                "type": "string",
+                "enum": ["sentiment", "word_count", "summary"],
+                "default": "sentiment",
+                "description": "Type of analysis to perform"
+            }
+        },
+        "required": ["text"]
+    },
+    input_model=TextAnalysisInput,
+    cache_ttl=3600
+)
+async def text_analysis(input_data: TextAnalysisInput) -> Dict[str, Any]:
+    """
+    Text analysis tool implementation
+    """
+    # Processed slice by slice so large texts never get a full lowercased copy or token list
+    if len(input_data.text) <= text_analyzer.CHUNK_SIZE * text_analyzer.PROGRESS_SLICES:
+        return text_result(text_analyzer.analyze_text(input_data.text, input_data.analysis_type))
+    # Large texts yield to the event loop as they go and report partial results
+    return text_result(await text_analyzer.analyze_text_async(
+        input_data.text, input_data.analysis_type, progress=report_progress if progress_enabled() else None
+    ))
+
+@registry.register(
+    name="file_search",
+    title="File Search",
+    description="Search for files in the system",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Search query for files"
+            },
+            "file_type": {
+                "type": "string",
+                "description": "Optional file type filter"
+            }
+        },
+        "required": ["query"]
+    },
+    input_model=FileSearchInput,
+    # Short: the index follows filesystem changes
+    cache_ttl=10,
+    # Without roots there is nothing to search, so the tool is not offered
+    enabled=bool(file_index.FILE_SEARCH_ROOTS)
+)
+async def file_search(input_data: FileSearchInput) -> Dict[str, Any]:
+    """
+    File search tool implementation: trigram index over the configured roots
+    """
+    # The first call may build the index; report how many files have been scanned
+    index = await file_index.default_index().ensure_ready(
+        progress=lambda count: report_progress(count, message=f"Indexed {count} files")
+    )
+    files, truncated = await index.search_async(input_data.query, input_data.file_type)
+
+    result = f"Found {len(files)}{'+' if truncated else ''} files matching '{input_data.query}'"
+    if input_data.file_type:
+        result += f" with type '{input_data.file_type}'"
+
+    return text_result(result + f"\nFiles: {', '.join(files)}")
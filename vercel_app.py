@@ -1,10 +1,23 @@
 #!/usr/bin/env python3
 """
 Vercel-compatible entry point for the MCP server
+
+With MCP_PROFILE_STARTUP=true the cold start is profiled: per-module import
+times and the time to the first byte of /mcp are logged (see startup_profile.py).
 """
 
-from app import app
+import time
+
+_process_start = time.perf_counter()
+
+import startup_profile
+
+if startup_profile.MCP_PROFILE_STARTUP:
+    with startup_profile.ImportTimer() as _timer:
+        from app import app
+    startup_profile.report(app, _timer, _process_start)
+else:
+    from app import app
 
 # This is the entry point for Vercel
 # Vercel will automatically handle the ASGI server
-
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Weather provider for the weather tool
+
+All upstream calls go through one shared httpx.AsyncClient, so connections are
+pooled and kept alive between lookups. Results are cached per normalized
+location for WEATHER_CACHE_TTL seconds in canonical metric units (Celsius,
+km/h) and converted on read, so a Celsius and a Fahrenheit request share an
+entry. The cache is a cache backend (see cache_backends, CACHE_BACKEND), so
+workers can share lookups; a failing backend only costs a miss. Concurrent lookups of the same location wait on a single upstream
+request instead of each issuing their own.
+
+Without WEATHER_API_KEY the provider returns simulated data. WEATHER_API_URL
+points it at any OpenWeatherMap-compatible endpoint, e.g. a local stub server
+(tests/weather_stub_server.py).
+"""
+
+import asyncio
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional
+
+import serialization
+from cache_backends import CacheBackend, create_backend
+
+if TYPE_CHECKING:
+    import httpx
+
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+# Seconds a lookup is served from cache, and the total size of cached lookups
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_MAX_BYTES = int(os.getenv("WEATHER_CACHE_MAX_BYTES", str(1024 * 1024)))
+# Upstream timeout (seconds) and connection pool limits
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "5.0"))
+WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", "20"))
+WEATHER_KEEPALIVE_CONNECTIONS = int(os.getenv("WEATHER_KEEPALIVE_CONNECTIONS", "10"))
+WEATHER_KEEPALIVE_EXPIRY = float(os.getenv("WEATHER_KEEPALIVE_EXPIRY", "30"))
+
+
+class WeatherError(ValueError):
+    """Lookup failed (unknown location, upstream error or timeout)"""
+
+
+@dataclass(frozen=True)
+class WeatherReport:
+    """Current conditions in canonical metric units"""
+    location: str
+    temperature_c: float
+    condition: str
+    humidity: int
+    wind_kph: float
+    timestamp: str
+
+    def temperature(self, units: str = "celsius") -> float:
+        if units == "fahrenheit":
+            return self.temperature_c * 9 / 5 + 32
+        return self.temperature_c
+
+    def describe(self, units: str = "celsius") -> str:
+        temp_symbol = "°F" if units == "fahrenheit" else "°C"
+        return (
+            f"Weather in {self.location}: {self.temperature(units):.0f}{temp_symbol}, {self.condition}. "
+            f"Humidity: {self.humidity}%, Wind: {self.wind_kph:.0f} km/h"
+        )
+
+
+def normalize_location(location: str) -> str:
+    """Cache key for a location: case- and whitespace-insensitive"""
+    return ",".join(" ".join(part.split()) for part in location.lower().split(","))
+
+
+class WeatherProvider:
+    def __init__(self, api_key: Optional[str] = WEATHER_API_KEY, api_url: str = WEATHER_API_URL,
+                 ttl: float = WEATHER_CACHE_TTL, cache: Optional[CacheBackend] = None):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.ttl = ttl
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._cache = cache if cache is not None else create_backend("weather", WEATHER_CACHE_MAX_BYTES)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Upstream requests actually issued (cache misses that were not coalesced)
+        self.upstream_requests = 0
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Shared client, created on first use inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            # httpx is only imported once a real lookup is made, not on every cold start
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=WEATHER_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=WEATHER_MAX_CONNECTIONS,
+                    max_keepalive_connections=WEATHER_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=WEATHER_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    async def get(self, location: str) -> WeatherReport:
+        key = normalize_location(location)
+        if not key:
+            raise WeatherError("Location must not be empty")
+
+        cached = self._cache.try_get(key)
+        if cached is not None:
+            try:
+                return WeatherReport(**serialization.loads(cached))
+            except (ValueError, TypeError):
+                # A damaged entry is a miss; the fresh lookup replaces it
+                pass
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_store(key, location))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def _fetch_and_store(self, key: str, location: str) -> WeatherReport:
+        self.upstream_requests += 1
+        report = await self._fetch(location)
+        self._cache.try_set(key, serialization.dumps(asdict(report)), self.ttl)
+        return report
+
+    async def _fetch(self, location: str) -> WeatherReport:
+        if not self.api_key:
+            return self._simulate(location)
+        import httpx
+        try:
+            response = await self.client.get(
+                self.api_url, params={"q": location, "appid": self.api_key, "units": "metric"}
+            )
+        except httpx.HTTPError as e:
+            raise WeatherError(f"Weather provider unavailable: {e.__class__.__name__}") from e
+        if response.status_code == 404:
+            raise WeatherError(f"Unknown location: {location}")
+        if response.status_code != 200:
+            raise WeatherError(f"Weather provider returned HTTP {response.status_code}")
+
+        data = response.json()
+        return WeatherReport(
+            location=data.get("name") or location,
+            temperature_c=float(data["main"]["temp"]),
+            condition=(data.get("weather") or [{}])[0].get("main", "Unknown"),
+            humidity=int(data["main"]["humidity"]),
+            # OpenWeatherMap reports metric wind speed in m/s
+            wind_kph=float(data.get("wind", {}).get("speed", 0.0)) * 3.6,
+            timestamp=datetime.fromtimestamp(data.get("dt", time.time())).isoformat(),
+        )
+
+    @staticmethod
+    def _simulate(location: str) -> WeatherReport:
+        # Simulated weather data used when no API key is configured
+        return WeatherReport(
+            location=location,
+            temperature_c=random.randint(15, 30),
+            condition=random.choice(["Sunny", "Cloudy", "Rainy", "Partly Cloudy"]),
+            humidity=random.randint(40, 80),
+            wind_kph=random.randint(5, 20),
+            timestamp=datetime.now().isoformat(),
+        )
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_default_provider: Optional[WeatherProvider] = None
+
+
+def default_provider() -> WeatherProvider:
+    """The process-wide provider (one connection pool and cache per process)"""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = WeatherProvider()
+    return _default_provider